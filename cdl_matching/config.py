@@ -13,18 +13,27 @@ MAX_MENTORS_PER_TABLE = 4
 NUM_MENTORS_POOL_DEFAULT = None
 
 # Domains for matching
-DEFAULT_DOMAINS = [
+DEFAULT_DOMAINS = (
     "AI", "FinTech", "Healthcare", "Marketing", "Robotics",
     "ClimateTech", "Retail", "Education", "Biotech", "Cybersecurity",
-]
+)
 
 # OS/OC load caps per mentor
 MAX_OS_PER_MENTOR = 3
 MAX_OC_PER_MENTOR = 3
 
+# MILP solver for the scheduling models: "highs", "cbc" or None (auto:
+# HiGHS if its binary is available, else CBC). The CDL_MILP_SOLVER
+# environment variable overrides this.
+MILP_SOLVER = None
+MILP_TIME_LIMIT = None   # seconds; None = no limit
+
 # Random seed for reproducible toy sets
 DEFAULT_SEED = 42
 
+# Directory for caching generated toy datasets on disk (None = no caching)
+TOY_DATASET_CACHE_DIR = None
+
 # -----------------------------------------------------------
 # Backwards-compatibility for older scheduling modules
 # -----------------------------------------------------------
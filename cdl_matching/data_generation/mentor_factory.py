@@ -1,8 +1,9 @@
 # cdl_matching/data_generation/mentor_factory.py
 from __future__ import annotations
 
-import random
-from typing import List, Set
+from typing import FrozenSet, List, Tuple
+
+import numpy as np
 
 from ..models import Mentor
 from ..config import (
@@ -25,28 +26,32 @@ def _distribute_mentors_across_tables(
       - each table has between min_per_table and max_per_table mentors
       - sum(counts) == total_mentors
     """
-    counts = [min_per_table] * num_tables
-    remaining = total_mentors - num_tables * min_per_table
+    if num_tables == 0:
+        return []
+
+    extra = total_mentors - num_tables * min_per_table
 
-    if remaining < 0:
+    if extra < 0:
         raise ValueError(
             f"Impossible distribution: total_mentors={total_mentors} "
             f"is less than num_tables * min_per_table = {num_tables * min_per_table}."
         )
 
-    idx = 0
-    while remaining > 0:
-        if counts[idx] < max_per_table:
-            counts[idx] += 1
-            remaining -= 1
-        idx = (idx + 1) % num_tables
-
-        if idx == 0 and all(c == max_per_table for c in counts) and remaining > 0:
-            # Should not happen if we respected the max capacity when choosing total_mentors
-            raise RuntimeError(
-                "Internal error in _distribute_mentors_across_tables: "
-                "no room left but remaining > 0."
-            )
+    # Round-robin in closed form: every table gets `base_extra` more,
+    # the first `leftover` tables get one more on top.
+    base_extra, leftover = divmod(extra, num_tables)
+    if min_per_table + base_extra + (1 if leftover else 0) > max_per_table:
+        # Should not happen if we respected the max capacity when choosing total_mentors
+        raise RuntimeError(
+            "Internal error in _distribute_mentors_across_tables: "
+            f"extra={extra} mentors over the minimum do not fit in "
+            f"{num_tables} tables of at most max_per_table={max_per_table}."
+        )
+
+    counts = [
+        min_per_table + base_extra + (1 if i < leftover else 0)
+        for i in range(num_tables)
+    ]
 
     return counts
 
@@ -72,8 +77,6 @@ def create_mentors_for_tables(
             f"Invalid min/max per table: min={min_per_table}, max={max_per_table}."
         )
 
-    rng = random.Random(seed)
-
     max_capacity = num_tables * max_per_table
     min_needed = num_tables * min_per_table
 
@@ -112,7 +115,15 @@ def create_mentors_for_tables(
     )
 
     # ---- domains: give each mentor 2 random domains from DEFAULT_DOMAINS ----
-    all_domains: List[str] = get_default_domains()
+    all_domains: Tuple[str, ...] = get_default_domains()
+
+    # 2 random domains per mentor (toy behaviour), sampled for all mentors at
+    # once: the k smallest of D uniform keys per row are k distinct domains.
+    k = 2 if len(all_domains) >= 2 else 1
+    rng = np.random.default_rng(seed)
+    domain_idx = np.argpartition(
+        rng.random((total_mentors, len(all_domains))), k - 1, axis=1
+    )[:, :k].tolist()
 
     mentors: List[Mentor] = []
     mentor_id_counter = 1
@@ -122,9 +133,9 @@ def create_mentors_for_tables(
             mentor_id = f"M{mentor_id_counter:03d}"
             name = f"Mentor {mentor_id_counter}"
 
-            # 2 random domains per mentor (toy behaviour)
-            k = 2 if len(all_domains) >= 2 else 1
-            mentor_domains: Set[str] = set(rng.sample(all_domains, k=k))
+            mentor_domains: FrozenSet[str] = frozenset(
+                all_domains[j] for j in domain_idx[mentor_id_counter - 1]
+            )
 
             mentor = Mentor(
                 id=mentor_id,
@@ -1,10 +1,14 @@
 # cdl_matching/data_generation/startup_factory.py
 from __future__ import annotations
 
+import importlib.util
 import random
-from typing import List, Dict, Optional, Tuple, Set
+from typing import List, Mapping, Optional, Tuple
 
-from ..models import Mentor, Startup
+import numpy as np
+import pulp
+
+from ..models import FitMatrix, Mentor, MentorColumns, Startup
 from ..config import (
     MAX_OS_PER_MENTOR,
     MAX_OC_PER_MENTOR,
@@ -13,157 +17,382 @@ from ..config import (
 from .domains import get_default_domains
 
 
-def _get_fit(
-    startup_id: str,
-    mentor: Mentor,
-    mentor_fit: Optional[Dict[Tuple[str, str], float]],
-    rng: random.Random,
-) -> float:
+_HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+
+def _fit_matrix(
+    startup_ids: List[str],
+    mentor_ids: List[str],
+    mentor_fit: Mapping[Tuple[str, str], float],
+) -> np.ndarray:
     """
-    Return fit score for (startup, mentor).
-    If mentor_fit is None, fall back to random so the function still works.
+    Fit of every mentor for every startup, shape (S, M) in the given orders.
     """
-    if mentor_fit is not None:
-        return mentor_fit[(startup_id, mentor.id)]
-    return rng.random()
+    # Integer row/column slicing instead of one tuple-keyed lookup per pair
+    fit_matrix = FitMatrix.from_mapping(mentor_fit)
+    fit = fit_matrix.submatrix(startup_ids, mentor_ids)
+    missing = np.argwhere(np.isnan(fit))
+    if len(missing):
+        i, j = missing[0].tolist()
+        raise KeyError((startup_ids[i], mentor_ids[j]))
+    return fit
 
 
-def _candidate_mentors(
-    mentors: List[Mentor],
+def _pick_best_mentor_for_role(
+    startup_id: str,
     role: str,
-    domain: str,
-    load: Dict[str, int],
+    fit_row: np.ndarray,
+    allowed: np.ndarray,
+    domain_mask: Optional[np.ndarray],
     max_load: int,
-    forbid_ids: Set[str] | None = None,
-    forbid_tables: Set[int] | None = None,
-) -> List[Mentor]:
+    selection: str = "argmax",
+    rng: Optional[random.Random] = None,
+) -> int:
     """
-    Filter mentors that are allowed for OS/OC, under capacity, and not in forbidden sets.
+    Return the index of the best-fit mentor among `allowed`
+    (role-eligible, under capacity, not forbidden).
     Prefer domain-matching mentors if available.
+
+    selection="weighted" instead draws one of them with probability
+    proportional to fit, using `rng`.
     """
-    forbid_ids = forbid_ids or set()
-    forbid_tables = forbid_tables or set()
+    if domain_mask is not None:
+        preferred = allowed & domain_mask
+        if preferred.any():
+            allowed = preferred
+
+    if not allowed.any():
+        raise RuntimeError(
+            f"No available {role.upper()} mentor for startup {startup_id} under cap {max_load}."
+        )
 
-    base = [m for m in mentors if load[m.id] < max_load]
+    if selection == "weighted":
+        candidates = np.flatnonzero(allowed)
+        weights = np.clip(fit_row[candidates], 0.0, None)
+        if weights.sum() > 0:
+            return int(rng.choices(candidates.tolist(), weights=weights.tolist(), k=1)[0])
+        return int(rng.choice(candidates.tolist()))
 
-    if role == "os":
-        base = [m for m in base if m.can_be_os]
-    elif role == "oc":
-        base = [m for m in base if m.can_be_oc]
-    else:
-        raise ValueError(f"Unknown role: {role}")
+    # Highest fit wins; argmax keeps the first mentor on ties, like max() did
+    return int(np.where(allowed, fit_row, -np.inf).argmax())
 
-    if forbid_ids:
-        base = [m for m in base if m.id not in forbid_ids]
-    if forbid_tables:
-        base = [m for m in base if m.table_id not in forbid_tables]
 
-    # Prefer mentors whose domains contain the startup's domain
-    domain_matches = [m for m in base if domain in m.domains]
-    if domain_matches:
-        return domain_matches
+def _masked_argmax(
+    fit: np.ndarray,
+    allowed: np.ndarray,
+    preferred: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise _pick_best_mentor_for_role without the error path: argmax of
+    fit over `preferred` where a row has any, else over `allowed`.
+    Returns (index per row, whether the row had any allowed mentor).
+    """
+    mask = np.where(preferred.any(axis=1)[:, None], preferred, allowed)
+    return np.where(mask, fit, -np.inf).argmax(axis=1), mask.any(axis=1)
 
-    return base
 
+def _assign_os_oc_uncapped(
+    fit: np.ndarray,
+    can_be_os: np.ndarray,
+    can_be_oc: np.ndarray,
+    table_ids: np.ndarray,
+    domain_matrix: np.ndarray,
+    startup_domain_idx: np.ndarray,
+    max_os: int,
+    max_oc: int,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Whole-matrix version of _assign_os_oc that ignores per-mentor caps.
 
-def _pick_best_mentor_for_role(
-    startup_id: str,
-    mentors: List[Mentor],
-    role: str,
-    domain: str,
-    load: Dict[str, int],
-    max_load: int,
-    mentor_fit: Optional[Dict[Tuple[str, str], float]],
-    rng: random.Random,
-    forbid_ids: Set[str] | None = None,
-    forbid_tables: Set[int] | None = None,
-) -> Mentor:
-    candidates = _candidate_mentors(
-        mentors=mentors,
-        role=role,
-        domain=domain,
-        load=load,
-        max_load=max_load,
-        forbid_ids=forbid_ids,
-        forbid_tables=forbid_tables,
+    If no mentor ends up over its OS/OC cap, every pick was also under the
+    cap at its turn in the greedy loop, and an argmax over a superset that
+    lands inside the subset is the subset's argmax, so the result equals
+    _assign_os_oc's. Returns None when a cap is exceeded or some startup
+    has no candidate; callers then fall back to the sequential kernel.
+    """
+    num_startups, num_mentors = fit.shape
+    if num_startups == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if num_mentors == 0:
+        # argmax over no columns fails; _assign_os_oc raises the usual error
+        return None
+
+    # Row i: mentors covering startup i's domain (none if it is unknown)
+    domain_rows = np.zeros((num_startups, num_mentors), dtype=bool)
+    known = startup_domain_idx >= 0
+    domain_rows[known] = domain_matrix[:, startup_domain_idx[known]].T
+
+    os_allowed = np.broadcast_to(can_be_os, fit.shape)
+    os_idx, ok = _masked_argmax(fit, os_allowed, os_allowed & domain_rows)
+    if not ok.all() or np.bincount(os_idx, minlength=num_mentors).max(initial=0) > max_os:
+        return None
+
+    # OC must be on a different table than the startup's OS (so also ≠ OS)
+    oc_allowed = can_be_oc & (table_ids != table_ids[os_idx][:, None])
+    oc_idx, ok = _masked_argmax(fit, oc_allowed, oc_allowed & domain_rows)
+    if not ok.all() or np.bincount(oc_idx, minlength=num_mentors).max(initial=0) > max_oc:
+        return None
+
+    return os_idx, oc_idx
+
+
+def _assign_os_oc(
+    fit: np.ndarray,
+    can_be_os: np.ndarray,
+    can_be_oc: np.ndarray,
+    table_ids: np.ndarray,
+    domain_matrix: np.ndarray,
+    startup_domain_idx: np.ndarray,
+    max_os: int,
+    max_oc: int,
+    startup_ids: List[str],
+    selection: str = "argmax",
+    rng: Optional[random.Random] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Greedy OS/OC assignment kernel on plain arrays.
+
+    fit has shape (S, M); startup_domain_idx[i] is the column of startup i's
+    domain in domain_matrix, or -1 if no mentor lists it. Startups are
+    processed in row order; returns (os_idx, oc_idx), mentor rows per startup.
+    """
+    num_startups, num_mentors = fit.shape
+
+    # Track how many OS/OC each mentor (by row) already has
+    os_load = np.zeros(num_mentors, dtype=np.int16)
+    oc_load = np.zeros(num_mentors, dtype=np.int16)
+
+    os_idx = np.empty(num_startups, dtype=np.intp)
+    oc_idx = np.empty(num_startups, dtype=np.intp)
+
+    for i in range(num_startups):
+        fit_row = fit[i]
+        d = startup_domain_idx[i]
+        domain_mask = domain_matrix[:, d] if d >= 0 else None
+
+        # ---- OS mentor ----
+        o = _pick_best_mentor_for_role(
+            startup_id=startup_ids[i],
+            role="os",
+            fit_row=fit_row,
+            allowed=can_be_os & (os_load < max_os),
+            domain_mask=domain_mask,
+            max_load=max_os,
+            selection=selection,
+            rng=rng,
+        )
+        os_load[o] += 1
+
+        # ---- OC mentor ----
+        # OC must be a different mentor on a different table
+        forbidden = table_ids == table_ids[o]
+        forbidden[o] = True
+        c = _pick_best_mentor_for_role(
+            startup_id=startup_ids[i],
+            role="oc",
+            fit_row=fit_row,
+            allowed=can_be_oc & (oc_load < max_oc) & ~forbidden,
+            domain_mask=domain_mask,
+            max_load=max_oc,
+            selection=selection,
+            rng=rng,
+        )
+        oc_load[c] += 1
+
+        os_idx[i] = o
+        oc_idx[i] = c
+
+    return os_idx, oc_idx
+
+
+def _max_fit_assignment(
+    fit: np.ndarray,
+    allowed: np.ndarray,
+    cap: int,
+) -> Optional[np.ndarray]:
+    """
+    Give every row one allowed column, each column used at most `cap`
+    times, maximizing total fit. Returns the column per row, or None if
+    no such assignment exists.
+    """
+    num_rows, num_cols = fit.shape
+    if num_rows == 0:
+        return np.empty(0, dtype=np.intp)
+    if not allowed.any(axis=1).all() or num_rows > num_cols * cap:
+        return None
+
+    if _HAS_SCIPY:
+        from scipy.optimize import linear_sum_assignment
+
+        # Rectangular Hungarian on `cap` copies of every column
+        slot_col = np.repeat(np.arange(num_cols), cap)
+        cost = np.where(allowed, -fit, np.inf)[:, slot_col]
+        try:
+            rows, slots = linear_sum_assignment(cost)
+        except ValueError:  # infeasible cost matrix
+            return None
+        out = np.empty(num_rows, dtype=np.intp)
+        out[rows] = slot_col[slots]
+        return out
+
+    # Same transportation problem as a small MILP (its LP is integral)
+    prob = pulp.LpProblem("OS_OC_assignment", pulp.LpMaximize)
+    rows, cols = np.nonzero(allowed)
+    x = [
+        pulp.LpVariable(f"x_{i}_{j}", cat="Binary")
+        for i, j in zip(rows.tolist(), cols.tolist())
+    ]
+    prob += pulp.lpSum(float(fit[i, j]) * v for i, j, v in zip(rows, cols, x))
+    by_row: List[List[pulp.LpVariable]] = [[] for _ in range(num_rows)]
+    by_col: List[List[pulp.LpVariable]] = [[] for _ in range(num_cols)]
+    for i, j, v in zip(rows.tolist(), cols.tolist(), x):
+        by_row[i].append(v)
+        by_col[j].append(v)
+    for i, vs in enumerate(by_row):
+        prob += pulp.lpSum(vs) == 1, f"row_{i}"
+    for j, vs in enumerate(by_col):
+        if vs:
+            prob += pulp.lpSum(vs) <= cap, f"col_{j}"
+
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    if pulp.LpStatus[prob.status] != "Optimal":
+        return None
+    out = np.empty(num_rows, dtype=np.intp)
+    for i, j, v in zip(rows.tolist(), cols.tolist(), x):
+        if v.varValue is not None and v.varValue > 0.5:
+            out[i] = j
+    return out
+
+
+def _assign_os_oc_optimal(
+    fit: np.ndarray,
+    can_be_os: np.ndarray,
+    can_be_oc: np.ndarray,
+    table_ids: np.ndarray,
+    max_os: int,
+    max_oc: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Two sequential max-total-fit assignments: OS mentors under the OS cap,
+    then OC mentors under the OC cap, off each startup's OS table.
+    Uses scipy's linear_sum_assignment when available, else a PuLP model.
+    """
+    num_startups = fit.shape[0]
+
+    os_idx = _max_fit_assignment(
+        fit, np.broadcast_to(can_be_os, fit.shape), max_os
     )
+    if os_idx is None:
+        raise RuntimeError(
+            f"No OS assignment for {num_startups} startups under cap {max_os}."
+        )
 
-    if not candidates:
+    oc_allowed = can_be_oc & (table_ids != table_ids[os_idx][:, None])
+    oc_idx = _max_fit_assignment(fit, oc_allowed, max_oc)
+    if oc_idx is None:
         raise RuntimeError(
-            f"No available {role.upper()} mentor for startup {startup_id} under cap {max_load}."
+            f"No OC assignment for {num_startups} startups under cap {max_oc} "
+            "on tables different from their OS."
         )
 
-    # Choose mentor with highest fit for this startup
-    best = max(
-        candidates,
-        key=lambda m: _get_fit(startup_id, m, mentor_fit, rng),
-    )
-    return best
+    return os_idx, oc_idx
 
 
 def create_startups_with_os_oc(
     mentors: List[Mentor],
     num_startups: int = NUM_STARTUPS_DEFAULT,
     seed: Optional[int] = None,
-    mentor_fit: Optional[Dict[Tuple[str, str], float]] = None,
+    mentor_fit: Optional[Mapping[Tuple[str, str], float]] = None,
     max_os_per_mentor: int = MAX_OS_PER_MENTOR,
     max_oc_per_mentor: int = MAX_OC_PER_MENTOR,
+    selection: str = "argmax",
 ) -> List[Startup]:
     """
     Create startups; assign:
       - a random domain
       - OS mentor = best-fit mentor under OS cap
       - OC mentor = best-fit mentor (≠ OS) under OC cap, on a different table
+
+    If mentor_fit is None, random scores from build_random_mentor_fit(seed)
+    are used.
+
+    selection="weighted" samples OS/OC mentors with probability proportional
+    to fit instead of always taking the best one. selection="optimal"
+    maximizes total OS fit, then total OC fit, over all startups at once
+    (no domain preference).
     """
+    if selection not in ("argmax", "weighted", "optimal"):
+        raise ValueError(
+            f"selection must be 'argmax', 'weighted' or 'optimal', got {selection!r}."
+        )
+
+    if mentor_fit is None:
+        # Materialize random scores up front so selection is always array-based
+        from .toy_dataset import build_random_mentor_fit
+        mentor_fit = build_random_mentor_fit(mentors, num_startups, seed)
 
     rng = random.Random(seed)
     all_domains = get_default_domains()
 
-    # Track how many OS/OC each mentor already has
-    os_load: Dict[str, int] = {m.id: 0 for m in mentors}
-    oc_load: Dict[str, int] = {m.id: 0 for m in mentors}
+    cols = MentorColumns.from_mentors(mentors, all_domains)
 
-    startups: List[Startup] = []
+    # Draw every startup's domain in one call
+    startup_domains = rng.choices(all_domains, k=num_startups)
+    startup_ids = [f"S{s_idx}" for s_idx in range(1, num_startups + 1)]
 
-    for s_idx in range(1, num_startups + 1):
-        sid = f"S{s_idx}"
-        domain = rng.choice(all_domains)
+    fit = _fit_matrix(startup_ids, cols.ids, mentor_fit)
+    startup_domain_idx = np.fromiter(
+        (cols.domain_index.get(d, -1) for d in startup_domains),
+        dtype=np.intp,
+        count=num_startups,
+    )
 
-        # ---- OS mentor ----
-        os_mentor = _pick_best_mentor_for_role(
-            startup_id=sid,
-            mentors=mentors,
-            role="os",
-            domain=domain,
-            load=os_load,
-            max_load=max_os_per_mentor,
-            mentor_fit=mentor_fit,
-            rng=rng,
+    assigned = None
+    if selection == "optimal":
+        assigned = _assign_os_oc_optimal(
+            fit=fit,
+            can_be_os=cols.can_be_os,
+            can_be_oc=cols.can_be_oc,
+            table_ids=cols.table_ids,
+            max_os=max_os_per_mentor,
+            max_oc=max_oc_per_mentor,
         )
-        os_load[os_mentor.id] += 1
-
-        # ---- OC mentor ----
-        oc_mentor = _pick_best_mentor_for_role(
-            startup_id=sid,
-            mentors=mentors,
-            role="oc",
-            domain=domain,
-            load=oc_load,
-            max_load=max_oc_per_mentor,
-            mentor_fit=mentor_fit,
-            rng=rng,
-            forbid_ids={os_mentor.id},
-            forbid_tables={os_mentor.table_id},  # OC must be on a different table
+    elif selection == "argmax":
+        # One vectorized pass; only loop per startup if caps actually bind
+        assigned = _assign_os_oc_uncapped(
+            fit=fit,
+            can_be_os=cols.can_be_os,
+            can_be_oc=cols.can_be_oc,
+            table_ids=cols.table_ids,
+            domain_matrix=cols.domain_matrix,
+            startup_domain_idx=startup_domain_idx,
+            max_os=max_os_per_mentor,
+            max_oc=max_oc_per_mentor,
         )
-        oc_load[oc_mentor.id] += 1
+    os_idx, oc_idx = assigned if assigned is not None else _assign_os_oc(
+        fit=fit,
+        can_be_os=cols.can_be_os,
+        can_be_oc=cols.can_be_oc,
+        table_ids=cols.table_ids,
+        domain_matrix=cols.domain_matrix,
+        startup_domain_idx=startup_domain_idx,
+        max_os=max_os_per_mentor,
+        max_oc=max_oc_per_mentor,
+        startup_ids=startup_ids,
+        selection=selection,
+        rng=rng,
+    )
 
-        startup = Startup(
+    return [
+        Startup(
             id=sid,
             name=f"Startup {s_idx}",
             domain=domain,
-            os_id=os_mentor.id,
-            oc_id=oc_mentor.id,
+            os_id=cols.ids[o],
+            oc_id=cols.ids[c],
         )
-        startups.append(startup)
-
-    return startups
+        for s_idx, (sid, domain, o, c) in enumerate(
+            zip(startup_ids, startup_domains, os_idx.tolist(), oc_idx.tolist()),
+            start=1,
+        )
+    ]
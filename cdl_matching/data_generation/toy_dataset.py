@@ -1,11 +1,19 @@
 # cdl_matching/data_generation/toy_dataset.py
 from __future__ import annotations
-from typing import List, Tuple, Dict, Optional
-import random
+from typing import TYPE_CHECKING, List, Tuple, Dict, Iterable, Mapping, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import csv
 import os
+import json
+import hashlib
+import importlib.util
+import pickle
+import tempfile
 
-from ..models import Mentor, Startup
+import numpy as np
+
+from ..models import FitMatrix, Mentor, MentorColumns, Startup
 from ..config import (
     NUM_TABLES_DEFAULT,
     NUM_STARTUPS_DEFAULT,
@@ -14,62 +22,243 @@ from ..config import (
     MIN_MENTORS_PER_TABLE,
     MAX_MENTORS_PER_TABLE,
     NUM_MENTORS_POOL_DEFAULT,
+    TOY_DATASET_CACHE_DIR,
 )
 from .mentor_factory import create_mentors_for_tables
 from .startup_factory import create_startups_with_os_oc
+from .domains import get_default_domains
+
+
+_HAS_PANDAS = importlib.util.find_spec("pandas") is not None
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# pandas is imported lazily by the functions that use it: it is by far the
+# heaviest import here and most callers never touch it
+if TYPE_CHECKING:
+    import pandas as pd
+
 
+def _parse_fit_row(cells: List[str], width: int) -> np.ndarray:
+    """One CSV row of scores -> float32 vector of length `width`, NaN if missing."""
+    row = np.full(width, np.nan, dtype=np.float32)
+    cells = cells[:width]
+    try:
+        # Whole row converted in C in the common all-numeric case
+        row[:len(cells)] = np.array(cells, dtype=np.float32)
+    except ValueError:
+        for j, cell in enumerate(cells):
+            try:
+                row[j] = float(cell)
+            except ValueError:
+                pass
+    return row
 
-def load_fit_from_csv(csv_path: str) -> Optional[Dict[tuple[str, str], float]]:
+
+def _read_fit_csv_numpy(csv_path: str) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    pandas-free reader for the fit CSV: (startup_ids, mentor_ids, values)
+    with values shaped (mentors, startups) like the file.
+    """
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        startup_ids = [c.strip() for c in header[1:]]
+        mentor_ids: List[str] = []
+        rows: List[np.ndarray] = []
+        for row in reader:
+            if not row:
+                continue
+            mentor_ids.append(row[0].strip())
+            rows.append(_parse_fit_row(row[1:], len(startup_ids)))
+    values = (
+        np.vstack(rows) if rows
+        else np.empty((0, len(startup_ids)), dtype=np.float32)
+    )
+    return startup_ids, mentor_ids, values
+
+
+def _fit_cache_path(csv_path: str) -> str:
+    return csv_path + ".npz"
+
+
+def _load_cached_fit(csv_path: str) -> Optional[FitMatrix]:
+    """The .npz sidecar of csv_path, or None if missing or older than the CSV."""
+    path = _fit_cache_path(csv_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(csv_path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return FitMatrix(
+                startup_ids=data["startup_ids"].tolist(),
+                mentor_ids=data["mentor_ids"].tolist(),
+                scores=data["scores"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _store_cached_fit(csv_path: str, fit: FitMatrix) -> None:
+    path = _fit_cache_path(csv_path)
+    # Same temp-file-and-rename dance as _store_cached_dataset
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                startup_ids=np.array(fit.startup_ids, dtype=str),
+                mentor_ids=np.array(fit.mentor_ids, dtype=str),
+                scores=fit.scores,
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_fit_from_csv(
+    csv_path: str,
+    chunksize: Optional[int] = None,
+    cache: bool = False,
+) -> Optional[FitMatrix]:
     """
     Load fit matrix from CSV.
     Expected format:
         ,S1,S2,S3
     M001,0.9,0.1,0.1
     ...
+
+    Rows are mentors, columns are startups. Cells that do not parse as
+    numbers are treated as missing.
+
+    If chunksize is given, the file is read that many mentor rows at a time
+    and each chunk is reduced to float32 before the next one is parsed,
+    which bounds peak memory for very large files.
+
+    Without pandas, the file is parsed row by row with NumPy instead.
+
+    With cache=True the parsed matrix is also saved next to the CSV as
+    `<csv_path>.npz`, and later calls load that instead of parsing again
+    as long as it is not older than the CSV.
     """
     if not os.path.exists(csv_path):
         return None
-        
-    fit_data = {}
-    with open(csv_path, 'r') as f:
-        reader = csv.reader(f)
-        headers = next(reader) # [, S1, S2, S3]
-        startup_ids = headers[1:]
-        
-        for row in reader:
-            if not row: continue
-            mentor_id = row[0]
-            scores = row[1:]
-            for i, score_str in enumerate(scores):
-                if i < len(startup_ids):
-                    sid = startup_ids[i]
-                    try:
-                        val = float(score_str)
-                        fit_data[(sid, mentor_id)] = val
-                    except ValueError:
-                        pass
-    return fit_data
+
+    if cache:
+        cached = _load_cached_fit(csv_path)
+        if cached is not None:
+            return cached
+
+    if not _HAS_PANDAS:
+        startup_ids, mentor_ids, values = _read_fit_csv_numpy(csv_path)
+    elif chunksize is not None:
+        import pandas as pd
+
+        # The pyarrow engine has no chunked mode; use the C parser
+        mentor_ids: List[str] = []
+        blocks: List[np.ndarray] = []
+        startup_ids: List[str] = []
+        with pd.read_csv(
+            csv_path, index_col=0, engine="c", memory_map=True, chunksize=chunksize
+        ) as reader:
+            for chunk in reader:
+                chunk = chunk.apply(pd.to_numeric, errors="coerce")
+                startup_ids = [str(c) for c in chunk.columns]
+                mentor_ids.extend(str(i) for i in chunk.index)
+                blocks.append(chunk.to_numpy(dtype=np.float32))
+        values = (
+            np.vstack(blocks) if blocks
+            else np.empty((0, len(startup_ids)), dtype=np.float32)
+        )
+    else:
+        import pandas as pd
+
+        if _HAS_PYARROW:
+            # Multithreaded Arrow parser, no intermediate Python objects
+            df = pd.read_csv(csv_path, index_col=0, engine="pyarrow")
+        else:
+            # C parser reading straight from a memory-mapped file
+            df = pd.read_csv(csv_path, index_col=0, engine="c", memory_map=True)
+        df = df.apply(pd.to_numeric, errors="coerce")
+        startup_ids = [str(c) for c in df.columns]
+        mentor_ids = [str(i) for i in df.index]
+        values = df.to_numpy(dtype=np.float32)
+
+    # File is mentor x startup; FitMatrix is startup x mentor.
+    fit = FitMatrix(
+        startup_ids=startup_ids,
+        mentor_ids=mentor_ids,
+        scores=np.ascontiguousarray(values.T),
+    )
+    if cache:
+        _store_cached_fit(csv_path, fit)
+    return fit
+
+
+def _derive_seed(tag: str, base: Optional[int]) -> Optional[int]:
+    """
+    Stable 64-bit seed for the `tag` stream of a run seeded with `base`.
+
+    Each generator step hashes its own tag, so the streams are independent
+    of one another while staying reproducible. None stays None (fresh
+    entropy).
+    """
+    if base is None:
+        return None
+    return int.from_bytes(hashlib.md5(f"{tag}:{base}".encode()).digest()[:8], "big")
 
 
 def build_random_mentor_fit(
     mentors: List[Mentor],
     num_startups: int,
     seed: int | None = None,
-) -> Dict[tuple[str, str], float]:
+) -> FitMatrix:
     """
-    Random fit in [0,1] between each startup and each mentor.
+    Random fit in [0,1) between each startup and each mentor.
 
-    Key: (startup_id, mentor_id)
+    Rows are S1..S{num_startups}, columns follow `mentors`; the scores are
+    drawn in one call as float32. Lookups by (startup_id, mentor_id) still
+    work through the FitMatrix Mapping interface.
     """
-    rng = random.Random(seed)
-    fit: Dict[tuple[str, str], float] = {}
+    rng = np.random.default_rng(
+        _derive_seed(f"fit:{num_startups}:{len(mentors)}", seed)
+    )
+    return FitMatrix(
+        startup_ids=[f"S{s_idx}" for s_idx in range(1, num_startups + 1)],
+        mentor_ids=[m.id for m in mentors],
+        scores=rng.random((num_startups, len(mentors)), dtype=np.float32),
+    )
 
-    for s_idx in range(1, num_startups + 1):
-        sid = f"S{s_idx}"
-        for m in mentors:
-            fit[(sid, m.id)] = rng.random()
 
-    return fit
+# Bump when generation logic changes so stale cache entries are ignored
+_CACHE_VERSION = 4
+
+
+def _toy_dataset_cache_path(cache_dir: str, params: Dict[str, object]) -> str:
+    key = json.dumps(params, sort_keys=True)
+    digest = hashlib.sha1(f"v{_CACHE_VERSION}:{key}".encode()).hexdigest()
+    return os.path.join(os.path.expanduser(cache_dir), f"toy_dataset_{digest}.pkl")
+
+
+def _load_cached_dataset(path: str):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def _store_cached_dataset(path: str, dataset) -> None:
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temp file and rename so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(dataset, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 
 def make_toy_dataset(
@@ -80,20 +269,47 @@ def make_toy_dataset(
     min_per_table: int = MIN_MENTORS_PER_TABLE,
     max_per_table: int = MAX_MENTORS_PER_TABLE,
     num_mentors_pool: int = NUM_MENTORS_POOL_DEFAULT,
-    fit_matrix: Optional[Dict[tuple[str, str], float]] = None,
-) -> Tuple[List[Mentor], List[Startup], Dict[tuple[str, str], float]]:
+    fit_matrix: FitMatrix | Mapping[tuple[str, str], float] | None = None,
+    cache_dir: Optional[str] = TOY_DATASET_CACHE_DIR,
+) -> Tuple[List[Mentor], List[Startup], FitMatrix]:
     """
     Return mentors, startups, and a random mentor_fit matrix.
     If fit_matrix is provided, use it instead of random generation.
+
+    mentor_fit is always returned as a FitMatrix. A FitMatrix passed as
+    fit_matrix (e.g. from load_fit_from_csv) is used as-is, without a
+    round trip through dict keys; a tuple-keyed dict is converted once.
+
+    If cache_dir is set, randomly generated datasets (no fit_matrix, fixed
+    seed) are pickled there, keyed by the generator parameters, and loaded
+    from disk on later calls with the same parameters.
     """
+    cache_path = None
+    if cache_dir and fit_matrix is None and seed is not None:
+        cache_path = _toy_dataset_cache_path(
+            cache_dir,
+            {
+                "num_tables": num_tables,
+                "num_startups": num_startups,
+                "mentors_per_table": mentors_per_table,
+                "seed": seed,
+                "min_per_table": min_per_table,
+                "max_per_table": max_per_table,
+                "num_mentors_pool": num_mentors_pool,
+            },
+        )
+        cached = _load_cached_dataset(cache_path)
+        if cached is not None:
+            return cached
 
     # If fit_matrix is provided, derive mentors and startups from it
     if fit_matrix:
-        unique_mentors = sorted(list({k[1] for k in fit_matrix.keys()}))
-        unique_startups = sorted(list({k[0] for k in fit_matrix.keys()}))
+        fit_matrix = FitMatrix.from_mapping(fit_matrix)
+        # Ids come straight from the matrix (already unique); only the
+        # mentor order matters, for the table assignment below
+        unique_mentors = sorted(fit_matrix.mentor_ids)
         
         # Create mentors from the matrix keys
-        mentors = []
         # Assign tables round-robin style initially? Or just create them.
         # We need to assign them to tables for the 'pool'.
         # Let's just create them with dummy tables for now, 
@@ -107,23 +323,22 @@ def make_toy_dataset(
         import math
         mentors_per_t = math.ceil(len(unique_mentors) / num_tables)
         
-        for i, mid in enumerate(unique_mentors):
-            tid = (i // mentors_per_t) + 1
-            if tid > num_tables: tid = num_tables
-            mentors.append(Mentor(
-                id=mid,
-                name=f"Mentor {mid}",
-                table_id=tid,
-                domains={"General"}, # Dummy domain
-            ))
+        table_ids = np.minimum(
+            np.arange(len(unique_mentors)) // mentors_per_t + 1, num_tables
+        ).tolist()
+        general = frozenset({"General"})  # Dummy domain, shared by all mentors
+        mentors = [
+            Mentor(id=mid, name=f"Mentor {mid}", table_id=tid, domains=general)
+            for mid, tid in zip(unique_mentors, table_ids)
+        ]
             
-        num_startups = len(unique_startups)
+        num_startups = len(fit_matrix.startup_ids)
         mentor_fit = fit_matrix
         
     else:
         mentors = create_mentors_for_tables(
             num_tables=num_tables,
-            seed=seed,
+            seed=_derive_seed("mentors", seed),
             mentors_per_table=mentors_per_table,
             num_mentors_pool=num_mentors_pool,
             min_per_table=min_per_table,
@@ -141,8 +356,72 @@ def make_toy_dataset(
     startups: List[Startup] = create_startups_with_os_oc(
         mentors=mentors,
         num_startups=num_startups,
-        seed=seed,
+        seed=_derive_seed("startups", seed),
         mentor_fit=mentor_fit,
     )
 
+    if cache_path is not None:
+        _store_cached_dataset(cache_path, (mentors, startups, mentor_fit))
+
     return mentors, startups, mentor_fit
+
+
+def dataset_to_frames(
+    mentors: List[Mentor],
+    startups: List[Startup],
+    mentor_fit: Mapping[tuple[str, str], float],
+) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+    """
+    Columnar view of a toy dataset for pandas-based analysis.
+
+    Returns (mentors_df, startups_df, fit) where fit[i, j] is the score of
+    startups_df row i against mentors_df row j.
+    """
+    if not _HAS_PANDAS:
+        raise ImportError("dataset_to_frames requires pandas.")
+    import pandas as pd
+
+    cols = MentorColumns.from_mentors(mentors, get_default_domains())
+    mentors_df = pd.DataFrame({
+        "id": cols.ids,
+        "name": [m.name for m in mentors],
+        "table_id": cols.table_ids,
+        "domains": [sorted(m.domains) for m in mentors],
+        "can_be_os": cols.can_be_os,
+        "can_be_oc": cols.can_be_oc,
+    })
+    startups_df = pd.DataFrame({
+        "id": [s.id for s in startups],
+        "name": [s.name for s in startups],
+        "domain": [s.domain for s in startups],
+        "os_id": [s.os_id for s in startups],
+        "oc_id": [s.oc_id for s in startups],
+    })
+    fit = FitMatrix.from_mapping(mentor_fit).submatrix(startups_df["id"], cols.ids)
+    return mentors_df, startups_df, fit
+
+
+def make_toy_dataset_frames(**kwargs) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+    """make_toy_dataset(**kwargs), returned as dataset_to_frames(...)."""
+    return dataset_to_frames(*make_toy_dataset(**kwargs))
+
+
+def _make_toy_dataset_for_seed(seed: int, kwargs: Dict[str, object]):
+    return make_toy_dataset(seed=seed, **kwargs)
+
+
+def make_toy_datasets(
+    seeds: Iterable[int],
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> List[Tuple[List[Mentor], List[Startup], FitMatrix]]:
+    """
+    Build one toy dataset per seed, in parallel across processes.
+
+    Each call to make_toy_dataset is independent given its seed, so the
+    runs are farmed out to a ProcessPoolExecutor. kwargs are forwarded to
+    make_toy_dataset; results come back in the order of `seeds`.
+    """
+    seeds = list(seeds)
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(partial(_make_toy_dataset_for_seed, kwargs=kwargs), seeds))
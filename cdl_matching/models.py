@@ -1,24 +1,220 @@
 # cdl_matching/models.py
 from __future__ import annotations
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Set, Optional
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Mentor:
     id: str
     name: str
     table_id: int
-    domains: Set[str]
+    domains: FrozenSet[str]
     can_be_os: bool = True
     can_be_oc: bool = True
-    conflicts: Set[str] = field(default_factory=set)  # startup IDs or domains, up to you
+    conflicts: FrozenSet[str] = frozenset()  # startup IDs or domains, up to you
 
+    def __post_init__(self) -> None:
+        # Immutable and hashable: accept any iterable, store frozensets.
+        # Use dataclasses.replace() to derive a mentor with changed fields.
+        if not isinstance(self.domains, frozenset):
+            object.__setattr__(self, "domains", frozenset(self.domains))
+        if not isinstance(self.conflicts, frozenset):
+            object.__setattr__(self, "conflicts", frozenset(self.conflicts))
 
-@dataclass
+
+@dataclass(slots=True)
 class Startup:
     id: str
     name: str
     domain: str
     os_id: Optional[str] = None   # OS mentor ID
     oc_id: Optional[str] = None   # OC mentor ID
+
+
+@dataclass
+class MentorColumns:
+    """
+    Column-wise (SoA) view of a mentor list for vectorized filtering.
+    Row i describes mentors[i]; domain_matrix[i, d] is True when
+    mentors[i] covers domains[d].
+    """
+    ids: List[str]
+    table_ids: np.ndarray       # int32, shape (M,)
+    can_be_os: np.ndarray       # bool, shape (M,)
+    can_be_oc: np.ndarray       # bool, shape (M,)
+    domains: List[str]
+    domain_matrix: np.ndarray   # bool, shape (M, D)
+    domain_index: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.domain_index = {d: j for j, d in enumerate(self.domains)}
+
+    @classmethod
+    def from_mentors(cls, mentors: List[Mentor], domains: Iterable[str]) -> MentorColumns:
+        domains = list(domains)
+        n = len(mentors)
+        domain_index = {d: j for j, d in enumerate(domains)}
+
+        # One pass over the mentors, reading each attribute once into
+        # local lists; (mentor row, domain column) pairs are set in one go
+        ids: List[str] = []
+        table_ids: List[int] = []
+        can_be_os: List[bool] = []
+        can_be_oc: List[bool] = []
+        rows: List[int] = []
+        cols: List[int] = []
+        get_col = domain_index.get
+        for i, m in enumerate(mentors):
+            ids.append(m.id)
+            table_ids.append(m.table_id)
+            can_be_os.append(m.can_be_os)
+            can_be_oc.append(m.can_be_oc)
+            for d in m.domains:
+                j = get_col(d)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        domain_matrix = np.zeros((n, len(domains)), dtype=bool)
+        domain_matrix[rows, cols] = True
+
+        return cls(
+            ids=ids,
+            table_ids=np.array(table_ids, dtype=np.int32).reshape(n),
+            can_be_os=np.array(can_be_os, dtype=bool).reshape(n),
+            can_be_oc=np.array(can_be_oc, dtype=bool).reshape(n),
+            domains=domains,
+            domain_matrix=domain_matrix,
+        )
+
+    def domain_mask(self, domain: str) -> Optional[np.ndarray]:
+        """Mentors covering `domain`, or None if it is not one of `domains`."""
+        j = self.domain_index.get(domain)
+        return None if j is None else self.domain_matrix[:, j]
+
+
+@dataclass(eq=False)
+class FitMatrix(Mapping):
+    """
+    Dense startup x mentor fit scores.
+
+    scores[i, j] is the fit between startup_ids[i] and mentor_ids[j];
+    NaN marks a missing score. Scores are always stored as float32.
+
+    Also behaves as a read-only Mapping keyed by (startup_id, mentor_id),
+    so code written against the old tuple-keyed dict keeps working.
+
+    _derived holds values computed from `scores` (e.g. table-level fits)
+    that callers cache on the matrix; treat `scores` as read-only.
+    """
+    startup_ids: List[str]
+    mentor_ids: List[str]
+    scores: np.ndarray
+    startup_index: Dict[str, int] = field(init=False, repr=False)
+    mentor_index: Dict[str, int] = field(init=False, repr=False)
+    _derived: Dict[object, object] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.startup_ids = list(self.startup_ids)
+        self.mentor_ids = list(self.mentor_ids)
+        self.scores = np.asarray(self.scores, dtype=np.float32)
+        expected = (len(self.startup_ids), len(self.mentor_ids))
+        if self.scores.shape != expected:
+            raise ValueError(
+                f"FitMatrix scores have shape {self.scores.shape}, "
+                f"expected {expected} (startups x mentors)."
+            )
+        self.startup_index = {sid: i for i, sid in enumerate(self.startup_ids)}
+        self.mentor_index = {mid: j for j, mid in enumerate(self.mentor_ids)}
+
+    @classmethod
+    def from_mapping(cls, fit: Mapping) -> FitMatrix:
+        """
+        Build a FitMatrix from a (startup_id, mentor_id) -> score mapping.
+        Ids keep first-seen order; pairs absent from `fit` become NaN.
+        """
+        if isinstance(fit, FitMatrix):
+            return fit
+        startup_index: Dict[str, int] = {}
+        mentor_index: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        for (sid, mid), val in fit.items():
+            rows.append(startup_index.setdefault(sid, len(startup_index)))
+            cols.append(mentor_index.setdefault(mid, len(mentor_index)))
+            vals.append(val)
+        scores = np.full((len(startup_index), len(mentor_index)), np.nan, dtype=np.float32)
+        scores[rows, cols] = vals
+        return cls(
+            startup_ids=list(startup_index),
+            mentor_ids=list(mentor_index),
+            scores=scores,
+        )
+
+    def submatrix(self, startup_ids: Iterable[str], mentor_ids: Iterable[str]) -> np.ndarray:
+        """Scores for the given startups (rows) and mentors (columns), in that order."""
+        rows = [self.startup_index[sid] for sid in startup_ids]
+        cols = [self.mentor_index[mid] for mid in mentor_ids]
+        return self.scores[np.ix_(rows, cols)]
+
+    def pair_scores(
+        self, pairs: Iterable[Tuple[str, str]], default: float = 0.0
+    ) -> np.ndarray:
+        """
+        Fit for each (startup_id, mentor_id) pair, in order, as one float32
+        gather; unknown ids and missing cells give `default`.
+        """
+        s_get, m_get = self.startup_index.get, self.mentor_index.get
+        rows: List[int] = []
+        cols: List[int] = []
+        for sid, mid in pairs:
+            rows.append(s_get(sid, -1))
+            cols.append(m_get(mid, -1))
+        rows_arr = np.array(rows, dtype=np.intp)
+        cols_arr = np.array(cols, dtype=np.intp)
+        known = (rows_arr >= 0) & (cols_arr >= 0)
+        out = np.full(len(rows), default, dtype=np.float32)
+        out[known] = self.scores[rows_arr[known], cols_arr[known]]
+        out[np.isnan(out)] = default
+        return out
+
+    def score(self, startup_id: str, mentor_id: str) -> float:
+        """Fit for (startup, mentor) via two integer index lookups."""
+        return float(
+            self.scores[self.startup_index[startup_id], self.mentor_index[mentor_id]]
+        )
+
+    def as_dict(self) -> Dict[Tuple[str, str], float]:
+        """
+        Plain {(startup_id, mentor_id): score} dict of the non-missing cells,
+        built in one dict(zip(keys, values)) pass so it never rehashes
+        mid-fill. Values are Python floats.
+        """
+        rows, cols = np.nonzero(~np.isnan(self.scores))
+        sids, mids = self.startup_ids, self.mentor_ids
+        keys = [(sids[i], mids[j]) for i, j in zip(rows.tolist(), cols.tolist())]
+        return dict(zip(keys, self.scores[rows, cols].tolist()))
+
+    # ---- Mapping interface: key = (startup_id, mentor_id) ----
+
+    def __getitem__(self, key: Tuple[str, str]) -> float:
+        startup_id, mentor_id = key
+        try:
+            val = self.score(startup_id, mentor_id)
+        except KeyError:
+            raise KeyError(key) from None
+        if val != val:  # NaN = missing cell
+            raise KeyError(key)
+        return val
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        rows, cols = np.nonzero(~np.isnan(self.scores))
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            yield self.startup_ids[i], self.mentor_ids[j]
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.scores)))
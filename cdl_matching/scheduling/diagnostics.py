@@ -1,12 +1,41 @@
 # cdl_matching/scheduling/diagnostics.py
 from __future__ import annotations
 
-from typing import List, Dict, Tuple, Set, Iterable, Any
-from collections import Counter
-from copy import deepcopy
+from typing import List, Dict, Tuple, Set, Iterable, Any, Optional
+from collections import Counter, defaultdict
+import heapq
+
+import numpy as np
 
 from ..models import Mentor, Startup
-from .sets_and_params import build_sets_and_params
+from .sets_and_params import SetsAndParams, build_sets_and_params
+
+
+def _count_by_table(
+    S: Iterable[str],
+    T: Iterable[int],
+    table_os: Dict[str, int],
+    table_oc: Dict[str, int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-table OS/OC counts as dense arrays indexed by table id.
+
+    Table ids are small non-negative ints, so np.bincount does the counting
+    in one pass. Returns (T as an array in iteration order, os_counts,
+    oc_counts); both count arrays cover every id in T.
+    """
+    S_list = list(S)
+    T_arr = np.fromiter(T, dtype=np.int64)
+    minlength = int(T_arr.max()) + 1 if len(T_arr) else 0
+    os_counts = np.bincount(
+        np.fromiter((table_os[s] for s in S_list), dtype=np.int64, count=len(S_list)),
+        minlength=minlength,
+    )
+    oc_counts = np.bincount(
+        np.fromiter((table_oc[s] for s in S_list), dtype=np.int64, count=len(S_list)),
+        minlength=minlength,
+    )
+    return T_arr, os_counts, oc_counts
 
 
 def analyze_session_feasibility(
@@ -15,11 +44,16 @@ def analyze_session_feasibility(
     num_sgms: int = 3,
     os_sgms_allowed: Tuple[int, ...] = (1, 2),
     oc_sgms_allowed: Tuple[int, ...] = (2, 3),
+    sets_and_params: Optional[SetsAndParams] = None,
 ) -> Dict[str, Any]:
     """
     Analyze if the current mentors/startups configuration can *possibly* be
     scheduled under the rules (before running MILP).
 
+    sets_and_params may be passed if build_sets_and_params(mentors, startups)
+    was already computed; it is returned under 'sets_and_params' so callers
+    can hand it on to auto_fix_overloaded_tables(*...) or solve_schedule.
+
     Returns a dict with:
       - 'ok': bool
       - 'messages': list[str] (human-readable diagnostics)
@@ -28,6 +62,9 @@ def analyze_session_feasibility(
       - 'os_table_counts': Dict[int, int]
       - 'oc_table_counts': Dict[int, int]
       - 'total_table_meetings': Dict[int, int]     (OS + OC)
+      - 'table_ids': np.ndarray of table ids, in the same order as the dicts
+      - 'os_counts_arr', 'oc_counts_arr', 'total_counts_arr': np.ndarray
+        counts aligned with 'table_ids'
 
       - 'os_overloaded': List[Tuple[int, int]]
       - 'oc_overloaded': List[Tuple[int, int]]
@@ -39,42 +76,139 @@ def analyze_session_feasibility(
       - 'num_tables': int
       - 'min_tables_from_os': int  (necessary lower bound from OS capacity)
       - 'min_tables_from_oc': int  (necessary lower bound from OC capacity)
+      - 'sets_and_params': SetsAndParams
+      - 'num_sgms', 'os_sgms_allowed', 'oc_sgms_allowed': the inputs, so
+        apply_move_to_diagnostics can patch this result after a move
     """
-    messages: List[str] = []
+    if sets_and_params is None:
+        sets_and_params = build_sets_and_params(mentors, startups)
+    S, T, table_os, table_oc = sets_and_params
 
-    S, T, table_os, table_oc = build_sets_and_params(mentors, startups)
+    # Count OS/OC assignments per table
+    T_arr, os_counts, oc_counts = _count_by_table(S, T, table_os, table_oc)
 
-    num_startups = len(S)
-    num_tables = len(T)
+    return _feasibility_report(
+        sets_and_params,
+        T_arr,
+        os_counts,
+        oc_counts,
+        num_sgms,
+        os_sgms_allowed,
+        oc_sgms_allowed,
+    )
 
-    # ---------- 1. Per-SGM capacity check ----------
-    # Each SGM has `num_tables` slots. Each startup needs 1 slot in each SGM.
-    # Necessary: num_startups <= num_tables.
+
+def _per_sgm_capacity_messages(num_startups: int, num_tables: int) -> List[str]:
+    """
+    Each SGM has `num_tables` slots and each startup needs 1 slot in each
+    SGM, so num_startups <= num_tables is necessary.
+    """
     if num_startups > num_tables:
-        messages.append(
+        return [
             f"Per-SGM capacity violated: {num_startups} startups but only "
             f"{num_tables} tables. Must add tables or reduce startups."
-        )
+        ]
+    return []
+
+
+def structural_precheck(num_startups: int, num_tables: int) -> List[str]:
+    """
+    Counting-only necessary conditions, checkable before any mentors,
+    startups or fit scores are built. Returns the violated ones as
+    messages; an empty list means "not ruled out" (run
+    analyze_session_feasibility on the real session for the full check).
+
+    Only the per-SGM capacity check applies here: once it passes, the
+    per-role and total OS/OC meeting counts fit too, so what remains
+    depends on which tables the OS/OC mentors sit at.
+    """
+    return _per_sgm_capacity_messages(num_startups, num_tables)
+
+
+def apply_move_to_diagnostics(
+    diag: Dict[str, Any],
+    startup_id: str,
+    role: str,
+    new_table: int,
+) -> Dict[str, Any]:
+    """
+    Diagnostics after moving one startup's OS (role="OS") or OC mentor to a
+    mentor at `new_table`, patched from the previous analyze_session_feasibility
+    result instead of recounting every startup. Only the two touched tables'
+    counts change; the report is then rebuilt from the count arrays.
+
+    diag["sets_and_params"] is updated in place and carried over.
+    """
+    sets_and_params = diag["sets_and_params"]
+    table_of = sets_and_params.table_os if role == "OS" else sets_and_params.table_oc
+    old_table = table_of[startup_id]
+    table_of[startup_id] = new_table
+
+    # Back to dense arrays indexed by table id, as _count_by_table returns
+    T_arr = diag["table_ids"]
+    size = int(T_arr.max()) + 1 if len(T_arr) else 0
+    os_counts = np.zeros(size, dtype=np.int64)
+    oc_counts = np.zeros(size, dtype=np.int64)
+    os_counts[T_arr] = diag["os_counts_arr"]
+    oc_counts[T_arr] = diag["oc_counts_arr"]
+
+    counts = os_counts if role == "OS" else oc_counts
+    counts[old_table] -= 1
+    counts[new_table] += 1
+
+    return _feasibility_report(
+        sets_and_params,
+        T_arr,
+        os_counts,
+        oc_counts,
+        diag["num_sgms"],
+        diag["os_sgms_allowed"],
+        diag["oc_sgms_allowed"],
+    )
+
+
+def _feasibility_report(
+    sets_and_params: SetsAndParams,
+    T_arr: np.ndarray,
+    os_counts: np.ndarray,
+    oc_counts: np.ndarray,
+    num_sgms: int,
+    os_sgms_allowed: Tuple[int, ...],
+    oc_sgms_allowed: Tuple[int, ...],
+) -> Dict[str, Any]:
+    """
+    Build the analyze_session_feasibility result from per-table OS/OC counts
+    (dense arrays indexed by table id, see _count_by_table).
+    """
+    S, T, _, _ = sets_and_params
+    total_counts = os_counts + oc_counts
+
+    messages: List[str] = []
+
+    num_startups = len(S)
+    num_tables = len(T)
+
+    # ---------- 1. Per-SGM capacity check ----------
+    messages.extend(_per_sgm_capacity_messages(num_startups, num_tables))
 
     # ---------- 2. Per-table OS/OC capacity implied by allowed SGMs ----------
     max_os_per_table = len(os_sgms_allowed)
     max_oc_per_table = len(oc_sgms_allowed)
 
-    # Count OS/OC assignments per table
-    os_table_counts: Dict[int, int] = {t: 0 for t in T}
-    oc_table_counts: Dict[int, int] = {t: 0 for t in T}
+    # Counts aligned with T_arr (returned as arrays too)
+    T_list = T_arr.tolist()
+    os_counts_arr = os_counts[T_arr]
+    oc_counts_arr = oc_counts[T_arr]
+    total_counts_arr = total_counts[T_arr]
+    os_table_counts: Dict[int, int] = dict(zip(T_list, os_counts_arr.tolist()))
+    oc_table_counts: Dict[int, int] = dict(zip(T_list, oc_counts_arr.tolist()))
 
-    for s in S:
-        os_table = table_os[s]
-        oc_table = table_oc[s]
-        os_table_counts[os_table] += 1
-        oc_table_counts[oc_table] += 1
+    def _overloaded(counts: np.ndarray, cap: int) -> List[Tuple[int, int]]:
+        over = np.flatnonzero(counts > cap)
+        return list(zip(over.tolist(), counts[over].tolist()))
 
     # OS overload
-    os_overloaded: List[Tuple[int, int]] = []
-    for t, c in os_table_counts.items():
-        if c > max_os_per_table:
-            os_overloaded.append((t, c))
+    os_overloaded: List[Tuple[int, int]] = _overloaded(os_counts, max_os_per_table)
 
     if os_overloaded:
         for t, c in os_overloaded:
@@ -89,10 +223,7 @@ def analyze_session_feasibility(
         )
 
     # OC overload
-    oc_overloaded: List[Tuple[int, int]] = []
-    for t, c in oc_table_counts.items():
-        if c > max_oc_per_table:
-            oc_overloaded.append((t, c))
+    oc_overloaded: List[Tuple[int, int]] = _overloaded(oc_counts, max_oc_per_table)
 
     if oc_overloaded:
         for t, c in oc_overloaded:
@@ -109,12 +240,8 @@ def analyze_session_feasibility(
     # ---------- 3. NEW: Total OS+OC meetings per table vs #SGMs ----------
     # Each required OS/OC meeting at table t needs its own SGM slot at t.
     # So we need: os_table_counts[t] + oc_table_counts[t] <= num_sgms.
-    total_table_meetings: Dict[int, int] = {
-        t: os_table_counts[t] + oc_table_counts[t] for t in T
-    }
-    total_overloaded: List[Tuple[int, int]] = [
-        (t, c) for t, c in total_table_meetings.items() if c > num_sgms
-    ]
+    total_table_meetings: Dict[int, int] = dict(zip(T_list, total_counts_arr.tolist()))
+    total_overloaded: List[Tuple[int, int]] = _overloaded(total_counts, num_sgms)
 
     if total_overloaded:
         for t, c in total_overloaded:
@@ -133,11 +260,12 @@ def analyze_session_feasibility(
     # Given each table can host at most `max_os_per_table` OS,
     # we need at least ceil(num_startups / max_os_per_table) tables from OS side,
     # and similarly for OC.
-    def ceil_div(a: int, b: int) -> int:
-        return (a + b - 1) // b if b > 0 else 0
-
-    min_tables_from_os = ceil_div(num_startups, max_os_per_table) if max_os_per_table else 0
-    min_tables_from_oc = ceil_div(num_startups, max_oc_per_table) if max_oc_per_table else 0
+    min_tables_from_os = (
+        (num_startups + max_os_per_table - 1) // max_os_per_table if max_os_per_table else 0
+    )
+    min_tables_from_oc = (
+        (num_startups + max_oc_per_table - 1) // max_oc_per_table if max_oc_per_table else 0
+    )
 
     ok = len(messages) == 0
 
@@ -163,6 +291,10 @@ def analyze_session_feasibility(
         "os_table_counts": os_table_counts,
         "oc_table_counts": oc_table_counts,
         "total_table_meetings": total_table_meetings,
+        "table_ids": T_arr,
+        "os_counts_arr": os_counts_arr,
+        "oc_counts_arr": oc_counts_arr,
+        "total_counts_arr": total_counts_arr,
         "os_overloaded": os_overloaded,
         "oc_overloaded": oc_overloaded,
         "total_overloaded": total_overloaded,
@@ -172,6 +304,10 @@ def analyze_session_feasibility(
         "num_tables": num_tables,
         "min_tables_from_os": min_tables_from_os,
         "min_tables_from_oc": min_tables_from_oc,
+        "sets_and_params": sets_and_params,
+        "num_sgms": num_sgms,
+        "os_sgms_allowed": os_sgms_allowed,
+        "oc_sgms_allowed": oc_sgms_allowed,
     }
 
 
@@ -215,13 +351,40 @@ def auto_fix_overloaded_tables(
     max_oc_per_table = len(oc_sgms_allowed)
 
     # Work on copies so we don't mutate caller's dicts
-    new_table_os = deepcopy(table_os)
-    new_table_oc = deepcopy(table_oc)
+    # (values are plain ints, so a shallow copy is enough)
+    new_table_os = dict(table_os)
+    new_table_oc = dict(table_oc)
 
     # Current counts
     os_count = Counter(new_table_os.values())
     oc_count = Counter(new_table_oc.values())
 
+    # Inverted index: table -> startups with their OS/OC there, kept in sync
+    # with every reassignment so offenders are found without rescanning S
+    os_by_table: Dict[int, Set[str]] = defaultdict(set)
+    oc_by_table: Dict[int, Set[str]] = defaultdict(set)
+    for s in S_set:
+        os_by_table[new_table_os[s]].add(s)
+        oc_by_table[new_table_oc[s]].add(s)
+
+    # Min-heap of (OS+OC load, position in T, table): the least loaded table
+    # comes first, ties keep T order. When a table's load changes a fresh
+    # entry is pushed; stale ones are dropped lazily when popped.
+    # total_load[t] mirrors os_count[t] + oc_count[t] and is updated on every
+    # move, so the heap checks never re-add the two counters.
+    T_pos: Dict[int, int] = {t: i for i, t in enumerate(T_list)}
+    total_load: Dict[int, int] = {t: os_count[t] + oc_count[t] for t in T_list}
+    load_heap: List[Tuple[int, int, int]] = [
+        (total_load[t], i, t) for i, t in enumerate(T_list)
+    ]
+    heapq.heapify(load_heap)
+
+    def move_load(src: int, dst: int) -> None:
+        total_load[src] -= 1
+        total_load[dst] += 1
+        heapq.heappush(load_heap, (total_load[src], T_pos[src], src))
+        heapq.heappush(load_heap, (total_load[dst], T_pos[dst], dst))
+
     def find_new_table_for(startup: str, is_os: bool) -> int | None:
         """
         Find a table with spare OS/OC capacity for this startup,
@@ -229,36 +392,37 @@ def auto_fix_overloaded_tables(
         the total (OS+OC) capacity implied by num_sgms.
         """
         other_table = new_table_oc[startup] if is_os else new_table_os[startup]
+        count, cap = (os_count, max_os_per_table) if is_os else (oc_count, max_oc_per_table)
+
+        popped: List[Tuple[int, int, int]] = []
+        found: int | None = None
+        while load_heap:
+            entry = heapq.heappop(load_heap)
+            load, _, t = entry
+            if load != total_load[t]:
+                continue  # stale entry
+            popped.append(entry)
+            if load >= num_sgms:
+                break  # every remaining table is at least this full
+            if t != other_table and count[t] < cap:
+                found = t
+                break
 
-        candidates: List[int] = []
-        if is_os:
-            for t in T_list:
-                if t == other_table:
-                    continue
-                # OS capacity + total (OS+OC) capacity
-                if os_count[t] < max_os_per_table and (os_count[t] + oc_count[t]) < num_sgms:
-                    candidates.append(t)
-            candidates.sort(key=lambda tt: os_count[tt] + oc_count[tt])
-        else:
-            for t in T_list:
-                if t == other_table:
-                    continue
-                if oc_count[t] < max_oc_per_table and (os_count[t] + oc_count[t]) < num_sgms:
-                    candidates.append(t)
-            candidates.sort(key=lambda tt: os_count[tt] + oc_count[tt])
-
-        return candidates[0] if candidates else None
+        # Valid entries we looked at stay in the heap
+        for entry in popped:
+            heapq.heappush(load_heap, entry)
+        return found
 
     changed = False
 
     # ---------- First: fix OC overloads ----------
     for t in list(T_list):
         while oc_count[t] > max_oc_per_table:
-            offenders = [s for s in S_set if new_table_oc[s] == t]
+            offenders = oc_by_table[t]
             if not offenders:
                 break  # safety
 
-            s = offenders[0]
+            s = next(iter(offenders))
             new_t = find_new_table_for(s, is_os=False)
             if new_t is None:
                 # cannot resolve this overload automatically
@@ -270,22 +434,27 @@ def auto_fix_overloaded_tables(
                     max_os_per_table,
                     max_oc_per_table,
                     num_sgms,
+                    os_counts=os_count,
+                    oc_counts=oc_count,
                 )
                 return new_table_os, new_table_oc, False, info
 
             oc_count[t] -= 1
             oc_count[new_t] += 1
+            oc_by_table[t].remove(s)
+            oc_by_table[new_t].add(s)
             new_table_oc[s] = new_t
+            move_load(t, new_t)
             changed = True
 
     # ---------- Then: fix OS overloads ----------
     for t in list(T_list):
         while os_count[t] > max_os_per_table:
-            offenders = [s for s in S_set if new_table_os[s] == t]
+            offenders = os_by_table[t]
             if not offenders:
                 break
 
-            s = offenders[0]
+            s = next(iter(offenders))
             new_t = find_new_table_for(s, is_os=True)
             if new_t is None:
                 info = _build_overload_info(
@@ -296,12 +465,17 @@ def auto_fix_overloaded_tables(
                     max_os_per_table,
                     max_oc_per_table,
                     num_sgms,
+                    os_counts=os_count,
+                    oc_counts=oc_count,
                 )
                 return new_table_os, new_table_oc, False, info
 
             os_count[t] -= 1
             os_count[new_t] += 1
+            os_by_table[t].remove(s)
+            os_by_table[new_t].add(s)
             new_table_os[s] = new_t
+            move_load(t, new_t)
             changed = True
 
     # Final diagnostics after attempted fix
@@ -313,6 +487,8 @@ def auto_fix_overloaded_tables(
         max_os_per_table,
         max_oc_per_table,
         num_sgms,
+        os_counts=os_count,
+        oc_counts=oc_count,
     )
 
     success_flag = (
@@ -331,17 +507,25 @@ def _build_overload_info(
     max_os_per_table: int,
     max_oc_per_table: int,
     num_sgms: int,
+    os_counts: Optional[Dict[int, int]] = None,
+    oc_counts: Optional[Dict[int, int]] = None,
 ) -> Dict[str, Any]:
     """
     Internal helper: recompute per-table counts and overloaded tables
     for a given OS/OC assignment, including combined OS+OC overload.
-    """
-    os_table_counts: Dict[int, int] = {t: 0 for t in T}
-    oc_table_counts: Dict[int, int] = {t: 0 for t in T}
 
-    for s in S:
-        os_table_counts[table_os[s]] += 1
-        oc_table_counts[table_oc[s]] += 1
+    If the caller already maintains per-table counts for this assignment
+    (os_counts / oc_counts, missing tables = 0), they are used as-is
+    instead of rescanning S.
+    """
+    if os_counts is not None and oc_counts is not None:
+        os_table_counts: Dict[int, int] = {t: os_counts.get(t, 0) for t in T}
+        oc_table_counts: Dict[int, int] = {t: oc_counts.get(t, 0) for t in T}
+    else:
+        T_arr, os_arr, oc_arr = _count_by_table(S, T, table_os, table_oc)
+        T_list = T_arr.tolist()
+        os_table_counts = dict(zip(T_list, os_arr[T_arr].tolist()))
+        oc_table_counts = dict(zip(T_list, oc_arr[T_arr].tolist()))
 
     os_overloaded: List[Tuple[int, int]] = [
         (t, c) for t, c in os_table_counts.items() if c > max_os_per_table
@@ -1,7 +1,12 @@
 # cdl_matching/scheduling/interactive_repair.py
 from __future__ import annotations
 
-from typing import List, Dict, Tuple
+import heapq
+from collections import defaultdict
+from contextlib import closing
+from typing import Iterator, List, Dict, Optional, Tuple
+
+import numpy as np
 
 from ..models import Mentor, Startup
 from ..config import (
@@ -11,39 +16,139 @@ from ..config import (
     MAX_OC_PER_MENTOR,
 )
 from ..data_generation.toy_dataset import make_toy_dataset
-from .diagnostics import analyze_session_feasibility
-from .sets_and_params import build_sets_and_params
+from .diagnostics import analyze_session_feasibility, apply_move_to_diagnostics
+from .sets_and_params import SetsAndParams, build_sets_and_params
 from .solve import solve_schedule  # MILP feasibility check
 
 
-def _index_mentors_by_id(mentors: List[Mentor]) -> Dict[str, Mentor]:
-    return {m.id: m for m in mentors}
+Loads = Tuple[Dict[str, int], Dict[str, int], Dict[int, int], Dict[int, int]]
+
+
+def _compute_loads(
+    os_idx: np.ndarray,
+    oc_idx: np.ndarray,
+    mentor_table: np.ndarray,
+    n_mentors: int,
+    n_tables: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Load-count kernel on plain int arrays.
+
+    os_idx / oc_idx hold each startup's OS / OC mentor index and
+    mentor_table maps mentor index -> table id (< n_tables). Returns
+    (os_load[n_mentors], oc_load[n_mentors], table_os_load[n_tables],
+    table_oc_load[n_tables]).
+    """
+    os_load = np.bincount(os_idx, minlength=n_mentors)
+    oc_load = np.bincount(oc_idx, minlength=n_mentors)
+    table_os_load = np.bincount(mentor_table[os_idx], minlength=n_tables)
+    table_oc_load = np.bincount(mentor_table[oc_idx], minlength=n_tables)
+    return os_load, oc_load, table_os_load, table_oc_load
 
 
 def _recompute_loads(
     mentors: List[Mentor],
     startups: List[Startup],
-) -> Tuple[Dict[str, int], Dict[str, int], Dict[int, int], Dict[int, int]]:
+) -> Loads:
     """
     Recompute per-mentor and per-table OS/OC loads from current startups.
     """
-    mentor_by_id = _index_mentors_by_id(mentors)
-    os_load = {m.id: 0 for m in mentors}
-    oc_load = {m.id: 0 for m in mentors}
-    table_os_load: Dict[int, int] = {m.table_id: 0 for m in mentors}
-    table_oc_load: Dict[int, int] = {m.table_id: 0 for m in mentors}
+    # Mentor ids -> indices once, then count in _compute_loads
+    mentor_index: Dict[str, int] = {m.id: i for i, m in enumerate(mentors)}
+    mentor_table = np.array([m.table_id for m in mentors], dtype=np.int64)
+    n_mentors = len(mentors)
+    n_tables = int(mentor_table.max()) + 1 if n_mentors else 0
+
+    os_idx = np.fromiter(
+        (mentor_index[st.os_id] for st in startups), dtype=np.int64, count=len(startups)
+    )
+    oc_idx = np.fromiter(
+        (mentor_index[st.oc_id] for st in startups), dtype=np.int64, count=len(startups)
+    )
+    os_counts, oc_counts, table_os_counts, table_oc_counts = (
+        arr.tolist()
+        for arr in _compute_loads(os_idx, oc_idx, mentor_table, n_mentors, n_tables)
+    )
 
-    for st in startups:
-        os_m = mentor_by_id[st.os_id]
-        oc_m = mentor_by_id[st.oc_id]
-        os_load[os_m.id] += 1
-        oc_load[oc_m.id] += 1
-        table_os_load[os_m.table_id] += 1
-        table_oc_load[oc_m.table_id] += 1
+    # Back to the id-keyed dicts callers index by; idle mentors/tables are 0
+    mentor_ids = list(mentor_index)
+    table_ids = list(dict.fromkeys(mentor_table.tolist()))
+    os_load = dict(zip(mentor_ids, os_counts))
+    oc_load = dict(zip(mentor_ids, oc_counts))
+    table_os_load: Dict[int, int] = {t: table_os_counts[t] for t in table_ids}
+    table_oc_load: Dict[int, int] = {t: table_oc_counts[t] for t in table_ids}
 
     return os_load, oc_load, table_os_load, table_oc_load
 
 
+class RepairState:
+    """
+    OS/OC loads for one repair session, kept in step with each move, plus a
+    min-heap of mentors keyed by their table's OS+OC load.
+
+    Heap entries are (table_load, mentor_index, version). A move re-pushes
+    the mentors of the two touched tables with a bumped version; older
+    entries are stale and dropped when popped (lazy deletion).
+    """
+
+    def __init__(self, mentors: List[Mentor], startups: List[Startup]):
+        self.mentors = mentors
+        self.loads: Loads = _recompute_loads(mentors, startups)
+        self._mentor_by_id: Dict[str, Mentor] = {m.id: m for m in mentors}
+        self._indices_at_table: Dict[int, List[int]] = defaultdict(list)
+        for i, m in enumerate(mentors):
+            self._indices_at_table[m.table_id].append(i)
+        self._version = [0] * len(mentors)
+        self._heap = [
+            (self.table_load(m.table_id), i, 0) for i, m in enumerate(mentors)
+        ]
+        heapq.heapify(self._heap)
+
+    def table_load(self, table_id: int) -> int:
+        _, _, table_os_load, table_oc_load = self.loads
+        return table_os_load[table_id] + table_oc_load[table_id]
+
+    def move(self, role: str, old_mentor_id: str, new_mentor_id: str) -> None:
+        """Record that one startup's `role` mentor changed."""
+        os_load, oc_load, table_os_load, table_oc_load = self.loads
+        if role == "OS":
+            mentor_load, table_role_load = os_load, table_os_load
+        else:
+            mentor_load, table_role_load = oc_load, table_oc_load
+
+        old_t = self._mentor_by_id[old_mentor_id].table_id
+        new_t = self._mentor_by_id[new_mentor_id].table_id
+        mentor_load[old_mentor_id] -= 1
+        mentor_load[new_mentor_id] += 1
+        table_role_load[old_t] -= 1
+        table_role_load[new_t] += 1
+
+        for t in {old_t, new_t}:
+            load = self.table_load(t)
+            for i in self._indices_at_table[t]:
+                self._version[i] += 1
+                heapq.heappush(self._heap, (load, i, self._version[i]))
+
+    def mentors_by_table_load(self) -> Iterator[Mentor]:
+        """
+        Yield mentors by current table load (ties in mentor order). Live
+        entries popped on the way are pushed back when the iterator is
+        exhausted or closed.
+        """
+        popped = []
+        try:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                _, i, version = entry
+                if version != self._version[i]:
+                    continue
+                popped.append(entry)
+                yield self.mentors[i]
+        finally:
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+
+
 def _score_startup(
     st: Startup,
     table_os: Dict[str, int],
@@ -76,24 +181,46 @@ def _choose_startup_for_overloaded_table_with_score(
     os_overload: Dict[int, int],
     oc_overload: Dict[int, int],
     total_overload: Dict[int, int],
+    candidates: Optional[List[Startup]] = None,
 ) -> Tuple[Startup, int, List[Tuple[str, int]]]:
     """
     Among startups that have OS/OC on the overloaded table, choose the
     one with the highest score.
 
+    `candidates` may pass those startups directly (e.g. a per-table bucket)
+    to skip the scan over all startups.
+
     Returns:
       - chosen startup
       - its score
-      - list of (startup_id, score) for all candidates on that table/role
+      - list of (startup_id, score) for the candidates scored; scoring stops
+        early once a candidate reaches the best attainable score, since no
+        later candidate can replace it (ties keep the first)
     """
-    if role == "OS":
-        candidates = [st for st in startups if table_os[st.id] == bad_table]
-    else:
-        candidates = [st for st in startups if table_oc[st.id] == bad_table]
+    if candidates is None:
+        if role == "OS":
+            candidates = [st for st in startups if table_os[st.id] == bad_table]
+        else:
+            candidates = [st for st in startups if table_oc[st.id] == bad_table]
 
     if not candidates:
         raise RuntimeError(f"No startup found on table {bad_table} for role {role}.")
 
+    # Upper bound on any candidate's score: the bad_table side is fixed,
+    # the other side is at most the worst table for the other role.
+    if role == "OS":
+        fixed_part = os_overload.get(bad_table, 0)
+        other_overload = oc_overload
+    else:
+        fixed_part = oc_overload.get(bad_table, 0)
+        other_overload = os_overload
+    fixed_part += total_overload.get(bad_table, 0)
+    other_tables = set(other_overload) | set(total_overload)
+    max_possible = fixed_part + max(
+        (other_overload.get(t, 0) + total_overload.get(t, 0) for t in other_tables),
+        default=0,
+    )
+
     scored: List[Tuple[str, int]] = []
     best_st = candidates[0]
     best_score = _score_startup(
@@ -102,6 +229,8 @@ def _choose_startup_for_overloaded_table_with_score(
     scored.append((best_st.id, best_score))
 
     for st in candidates[1:]:
+        if best_score >= max_possible:
+            break
         sc = _score_startup(
             st, table_os, table_oc, os_overload, oc_overload, total_overload
         )
@@ -121,11 +250,19 @@ def _find_candidate_mentors_for_role(
     max_os_per_table: int,
     max_oc_per_table: int,
     num_sgms: int,
+    loads: Optional[Loads] = None,
+    state: Optional[RepairState] = None,
+    limit: Optional[int] = None,
 ) -> List[Mentor]:
     """
     Return mentors that could be used to *move* a startup away from an overloaded table,
     based on current loads and table caps.
 
+    `loads` is the (os_load, oc_load, table_os_load, table_oc_load) tuple from
+    _recompute_loads for the current startups; it is recomputed if omitted.
+    With a RepairState, its loads are used and mentors are drawn from its
+    heap in table-load order, stopping after `limit` candidates.
+
     We ensure:
       - mentor is eligible for the role
       - mentor is not already at the overloaded table
@@ -134,43 +271,56 @@ def _find_candidate_mentors_for_role(
         caps as the diagnostics: number of allowed SGMs for that role)
       - mentor's table does NOT exceed total OS+OC capacity (<= num_sgms).
     """
-    os_load, oc_load, table_os_load, table_oc_load = _recompute_loads(
-        mentors, startups
-    )
+    if state is not None:
+        loads = state.loads
+    elif loads is None:
+        loads = _recompute_loads(mentors, startups)
+    os_load, oc_load, table_os_load, table_oc_load = loads
 
-    candidates: List[Mentor] = []
-    for m in mentors:
+    def usable(m: Mentor) -> bool:
         if m.table_id == bad_table:
             # we explicitly want to move OFF this table
-            continue
+            return False
 
         # total OS+OC meetings already attached to this table
         total_here = table_os_load[m.table_id] + table_oc_load[m.table_id]
         if total_here >= num_sgms:
             # cannot add any more mandatory meetings to this table
-            continue
+            return False
 
         if role == "OS":
-            if not m.can_be_os:
-                continue
-            if os_load[m.id] >= MAX_OS_PER_MENTOR:
-                continue
-            if table_os_load[m.table_id] >= max_os_per_table:
-                continue
-        else:
-            if not m.can_be_oc:
-                continue
-            if oc_load[m.id] >= MAX_OC_PER_MENTOR:
-                continue
-            if table_oc_load[m.table_id] >= max_oc_per_table:
-                continue
-
-        candidates.append(m)
-
-    # Sort by current total load so we try to balance things
-    candidates.sort(
-        key=lambda mm: table_os_load[mm.table_id] + table_oc_load[mm.table_id]
-    )
+            return (
+                m.can_be_os
+                and os_load[m.id] < MAX_OS_PER_MENTOR
+                and table_os_load[m.table_id] < max_os_per_table
+            )
+        return (
+            m.can_be_oc
+            and oc_load[m.id] < MAX_OC_PER_MENTOR
+            and table_oc_load[m.table_id] < max_oc_per_table
+        )
+
+    if state is None:
+        candidates = [m for m in mentors if usable(m)]
+
+        # Order by current total load so we try to balance things;
+        # nsmallest (a plain min() for limit=1) skips the full sort
+        def table_load(mm: Mentor) -> int:
+            return table_os_load[mm.table_id] + table_oc_load[mm.table_id]
+
+        if limit is None:
+            candidates.sort(key=table_load)
+            return candidates
+        return heapq.nsmallest(limit, candidates, key=table_load)
+
+    # Heap already yields mentors by total load
+    candidates = []
+    with closing(state.mentors_by_table_load()) as ordered:
+        for m in ordered:
+            if usable(m):
+                candidates.append(m)
+                if limit is not None and len(candidates) >= limit:
+                    break
     return candidates
 
 
@@ -186,10 +336,19 @@ def _auto_fix_one_overload(
     max_os_per_table: int,
     max_oc_per_table: int,
     num_sgms: int,
-) -> bool:
+    state: Optional[RepairState] = None,
+    sets_and_params: Optional[SetsAndParams] = None,
+) -> Tuple[bool, Optional[Tuple[str, str, int]]]:
     """
     Try to fix one overload by changing OS or OC mentor for a single startup.
 
+    Returns (fixed, move): move is (startup_id, role, new_table) for the
+    change made, or None, and can be fed to apply_move_to_diagnostics.
+    sets_and_params (e.g. diag["sets_and_params"]) skips rebuilding them.
+
+    Pass the session's RepairState to reuse its loads and mentor heap; it is
+    updated with the move made here.
+
     Strategy:
       - Prefer fixing OS overload first, then OC overload, then total overload.
       - Among startups on that table (for that role), choose the one with
@@ -197,7 +356,16 @@ def _auto_fix_one_overload(
       - Move that startup to a different mentor/table for that role,
         but ONLY to tables with spare per-table *and* total OS+OC capacity.
     """
-    S, T, table_os, table_oc = build_sets_and_params(mentors, startups)
+    if sets_and_params is None:
+        sets_and_params = build_sets_and_params(mentors, startups)
+    S, T, table_os, table_oc = sets_and_params
+
+    # Startups bucketed by their OS / OC table
+    startups_by_os_table: Dict[int, List[Startup]] = defaultdict(list)
+    startups_by_oc_table: Dict[int, List[Startup]] = defaultdict(list)
+    for st in startups:
+        startups_by_os_table[table_os[st.id]].append(st)
+        startups_by_oc_table[table_oc[st.id]].append(st)
 
     # Priority: OS overload → OC overload → total overload
     if os_overloaded_tables:
@@ -208,13 +376,14 @@ def _auto_fix_one_overload(
         role = "OC"
     elif total_overloaded_tables:
         bad_table = total_overloaded_tables[0]
-        # Decide whether to move OS or OC based on which side is heavier
-        os_count = sum(1 for s in S if table_os[s] == bad_table)
-        oc_count = sum(1 for s in S if table_oc[s] == bad_table)
+        # Decide whether to move OS or OC based on which side is heavier;
+        # the table buckets already hold both counts
+        os_count = len(startups_by_os_table.get(bad_table, ()))
+        oc_count = len(startups_by_oc_table.get(bad_table, ()))
         role = "OS" if os_count >= oc_count else "OC"
     else:
         # No overloaded tables to fix
-        return False
+        return False, None
 
     # Pick startup to modify using score
     st, score, scored_list = _choose_startup_for_overloaded_table_with_score(
@@ -226,6 +395,9 @@ def _auto_fix_one_overload(
         os_overload,
         oc_overload,
         total_overload,
+        candidates=(
+            startups_by_os_table if role == "OS" else startups_by_oc_table
+        )[bad_table],
     )
 
     print(f"[AUTO-FIX] Considering {role} overload on table {bad_table}")
@@ -237,6 +409,9 @@ def _auto_fix_one_overload(
         f"to move its {role}."
     )
 
+    # Loads are fixed until we move this startup; compute them once
+    loads = state.loads if state is not None else _recompute_loads(mentors, startups)
+
     # Find candidate mentors on other tables with free capacity for this role
     candidates = _find_candidate_mentors_for_role(
         mentors,
@@ -246,13 +421,16 @@ def _auto_fix_one_overload(
         max_os_per_table,
         max_oc_per_table,
         num_sgms,
+        loads=loads,
+        state=state,
+        limit=1,
     )
     if not candidates:
         print(
             "[AUTO-FIX] No valid new mentors found for this role "
             "with spare per-table and total capacity. Cannot fix structurally."
         )
-        return False
+        return False, None
 
     new_mentor = candidates[0]
 
@@ -261,15 +439,20 @@ def _auto_fix_one_overload(
             f"[AUTO-FIX] Moving OS of {st.id} from table {bad_table} "
             f"to mentor {new_mentor.id} at table {new_mentor.table_id}"
         )
+        old_mentor_id = st.os_id
         st.os_id = new_mentor.id
     else:
         print(
             f"[AUTO-FIX] Moving OC of {st.id} from table {bad_table} "
             f"to mentor {new_mentor.id} at table {new_mentor.table_id}"
         )
+        old_mentor_id = st.oc_id
         st.oc_id = new_mentor.id
 
-    return True
+    if state is not None:
+        state.move(role, old_mentor_id, new_mentor.id)
+
+    return True, (st.id, role, new_mentor.table_id)
 
 
 def interactive_build_session(
@@ -292,26 +475,34 @@ def interactive_build_session(
     """
     round_idx = 0
 
-    # Initial generation – keep mentor_fit for MILP
-    mentors, startups, mentor_fit = make_toy_dataset(
+    # Initial generation – fit scores are not needed for the feasibility check
+    mentors, startups, _ = make_toy_dataset(
         num_tables=num_tables,
         num_startups=num_startups,
         mentors_per_table=mentors_per_table,
     )
+    # Loads + mentor heap, updated by each auto-fix move
+    state = RepairState(mentors, startups)
+    diag = None
+    last_move = None
 
     while True:
         round_idx += 1
         print(f"\n========== ROUND {round_idx} ==========")
         print(f"Current settings: tables={num_tables}, startups={num_startups}")
 
-        # 1) Structural diagnostics
-        diag = analyze_session_feasibility(
-            mentors,
-            startups,
-            num_sgms=num_sgms,
-            os_sgms_allowed=(1, 2),
-            oc_sgms_allowed=(2, 3),
-        )
+        # 1) Structural diagnostics: a full pass on the first round, then
+        #    patched with the single move the previous round made
+        if last_move is not None:
+            diag = apply_move_to_diagnostics(diag, *last_move)
+        else:
+            diag = analyze_session_feasibility(
+                mentors,
+                startups,
+                num_sgms=num_sgms,
+                os_sgms_allowed=(1, 2),
+                oc_sgms_allowed=(2, 3),
+            )
 
         print("=== DIAGNOSTICS ===")
         if diag["messages"]:
@@ -321,27 +512,24 @@ def interactive_build_session(
             print("- No structural capacity issues detected.")
         print("Suggestion:", diag["suggestion"])
 
-        # Compute overload magnitudes per table
-        os_counts = diag["os_table_counts"]
-        oc_counts = diag["oc_table_counts"]
-        total_counts = diag["total_table_meetings"]
+        # Overload magnitudes per table = max(0, count - cap), on the
+        # count arrays the diagnostics return alongside the dicts
+        tables = diag["table_ids"].tolist()
 
         max_os_per_table = len((1, 2))  # OS allowed in SGM1 & SGM2
         max_oc_per_table = len((2, 3))  # OC allowed in SGM2 & SGM3
 
-        os_overload: Dict[int, int] = {
-            t: max(0, c - max_os_per_table) for t, c in os_counts.items()
-        }
-        oc_overload: Dict[int, int] = {
-            t: max(0, c - max_oc_per_table) for t, c in oc_counts.items()
-        }
-        total_overload: Dict[int, int] = {
-            t: max(0, c - num_sgms) for t, c in total_counts.items()
-        }
+        os_overload_arr = np.clip(diag["os_counts_arr"] - max_os_per_table, 0, None)
+        oc_overload_arr = np.clip(diag["oc_counts_arr"] - max_oc_per_table, 0, None)
+        total_overload_arr = np.clip(diag["total_counts_arr"] - num_sgms, 0, None)
+
+        os_overload: Dict[int, int] = dict(zip(tables, os_overload_arr.tolist()))
+        oc_overload: Dict[int, int] = dict(zip(tables, oc_overload_arr.tolist()))
+        total_overload: Dict[int, int] = dict(zip(tables, total_overload_arr.tolist()))
 
-        os_over = [t for t, extra in os_overload.items() if extra > 0]
-        oc_over = [t for t, extra in oc_overload.items() if extra > 0]
-        total_over = [t for t, extra in total_overload.items() if extra > 0]
+        os_over = [tables[i] for i in np.flatnonzero(os_overload_arr).tolist()]
+        oc_over = [tables[i] for i in np.flatnonzero(oc_overload_arr).tolist()]
+        total_over = [tables[i] for i in np.flatnonzero(total_overload_arr).tolist()]
 
         print("\nOverloaded OS tables:", os_over)
         print("Overloaded OC tables:", oc_over)
@@ -350,11 +538,13 @@ def interactive_build_session(
         # 2) If structurally OK, test MILP feasibility
         if diag["ok"]:
             print("\n[CHECK] Structural capacity OK. Checking MILP feasibility...")
+            # Only feasibility matters here, so skip the fit objective
             status, sol = solve_schedule(
                 mentors,
                 startups,
-                mentor_fit,
+                None,
                 num_sgms=num_sgms,
+                sets_and_params=diag["sets_and_params"],
             )
             print(f"[MILP] Solver status: {status}")
 
@@ -368,7 +558,7 @@ def interactive_build_session(
                 "Trying further OS/OC reassignment (if any possible)..."
             )
 
-            fixed = _auto_fix_one_overload(
+            fixed, last_move = _auto_fix_one_overload(
                 mentors,
                 startups,
                 os_over,
@@ -380,6 +570,8 @@ def interactive_build_session(
                 max_os_per_table,
                 max_oc_per_table,
                 num_sgms,
+                state=state,
+                sets_and_params=diag["sets_and_params"],
             )
             if not fixed:
                 print(
@@ -401,7 +593,7 @@ def interactive_build_session(
 
         # 3) If structurally NOT OK, auto-fix overloads
         print("\n[REPAIR] Structural issues detected. Trying automatic OS/OC reassignment...")
-        fixed = _auto_fix_one_overload(
+        fixed, last_move = _auto_fix_one_overload(
             mentors,
             startups,
             os_over,
@@ -413,6 +605,8 @@ def interactive_build_session(
             max_os_per_table,
             max_oc_per_table,
             num_sgms,
+            state=state,
+            sets_and_params=diag["sets_and_params"],
         )
 
         if not fixed:
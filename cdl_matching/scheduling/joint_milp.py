@@ -2,100 +2,103 @@
 
 from __future__ import annotations
 
-from typing import List, Dict, Tuple
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import replace
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
 import pulp
 
-from cdl_matching.models import Mentor, Startup
+from cdl_matching.models import FitMatrix, Mentor, Startup
 from cdl_matching.config import MAX_OS_PER_MENTOR, MAX_OC_PER_MENTOR
+from cdl_matching.scheduling.solvers import make_solver
+from cdl_matching.scheduling.solve import greedy_schedule
 
+# OS/OC allowed SGMs
+K = [1, 2, 3]
+OS_SGMS = [1, 2]
+OC_SGMS = [2, 3]
 
-def solve_joint_schedule(
-    mentors: List[Mentor],
-    startups: List[Startup],
-    mentor_fit: Dict[Tuple[str, str], float],
-    num_sgms: int = 3,
-):
-    """
-    Joint MILP:
-      - chooses OS and OC mentors for each startup
-      - chooses in which SGM (time slot) those meetings happen
-      - schedules ALL SGM table occupancy
-      - maximizes total OS+OC fit.
-
-    Rules implemented:
-      - OS can be in SGM 1 OR 2.
-      - OC can be in SGM 2 OR 3.
-      - OS must be BEFORE OC:
-            allowed combos: (OS1,OC2), (OS1,OC3), (OS2,OC3)
-            forbidden:       (OS2,OC2)
-      - Each startup has exactly:
-            * 1 OS meeting (mentor + SGM)
-            * 1 OC meeting (mentor + SGM)
-      - OS and OC must be with DIFFERENT mentors AND on DIFFERENT tables.
-      - Each startup sits at exactly ONE table per SGM.
-      - Each table hosts at most ONE startup per SGM.
-      - Each startup visits any given table at most once in the whole day.
-      - Mentor caps: MAX_OS_PER_MENTOR / MAX_OC_PER_MENTOR.
-      - No hard domain filters; compatibility is encoded in fit scores.
-    """
+# Built models kept for reuse, keyed by structure (see _model_key)
+_MODEL_CACHE_SIZE = 8
+_MODEL_CACHE: "OrderedDict[Tuple, JointModel]" = OrderedDict()
 
-    assert num_sgms == 3, "This formulation assumes exactly 3 SGMs (1,2,3)."
 
+class JointModel(NamedTuple):
+    """
+    Structural part of the joint MILP: everything but the objective.
+    Build one with build_joint_model, pin choices with add_lock and
+    (re-)solve with solve_joint_model.
+    """
+    prob: pulp.LpProblem
+    S_ids: List[str]
+    x: Dict[str, Dict[int, Dict[int, pulp.LpVariable]]]
+    w_os: Dict[str, Dict[str, Dict[int, pulp.LpVariable]]]
+    w_oc: Dict[str, Dict[str, Dict[int, pulp.LpVariable]]]
+    os_ids_at_table: Dict[int, List[str]]
+    oc_ids_at_table: Dict[int, List[str]]
+    locks: Dict[str, str]
+
+
+def _model_key(mentors: List[Mentor], startups: List[Startup]) -> Tuple:
+    """Everything the constraints depend on; fit scores only enter the objective."""
+    return (
+        tuple(st.id for st in startups),
+        tuple((m.id, m.table_id, m.can_be_os, m.can_be_oc) for m in mentors),
+        MAX_OS_PER_MENTOR,
+        MAX_OC_PER_MENTOR,
+    )
+
+
+def build_joint_model(mentors: List[Mentor], startups: List[Startup]) -> JointModel:
+    """
+    Variables and constraints of the joint MILP (see solve_joint_schedule).
+    The objective is set per solve. The returned model is the caller's own
+    (not cached), so it may be locked with add_lock and re-solved.
+    """
     S_ids = [st.id for st in startups]
-    M_ids = [m.id for m in mentors]
     T_ids = sorted({m.table_id for m in mentors})
-    K = [1, 2, 3]
-
-    # Helper: table of each mentor
-    mentor_by_id: Dict[str, Mentor] = {m.id: m for m in mentors}
-    mentor_table: Dict[str, int] = {m.id: m.table_id for m in mentors}
 
-    # OS/OC allowed SGMs
-    OS_SGMS = [1, 2]
-    OC_SGMS = [2, 3]
+    # Helpers: mentors grouped by table, and role-eligible mentors, built once
+    # so the constraint loops below never filter mentors per (s, t)
+    mentors_at_table: Dict[int, List[Mentor]] = {t: [] for t in T_ids}
+    for m in mentors:
+        mentors_at_table[m.table_id].append(m)
+    os_eligible: List[Mentor] = [m for m in mentors if m.can_be_os]
+    oc_eligible: List[Mentor] = [m for m in mentors if m.can_be_oc]
 
     # ---------- Problem ----------
     prob = pulp.LpProblem("CDL_Joint_OS_OC_Scheduling", pulp.LpMaximize)
 
     # ---------- Decision variables ----------
 
-    # x[s, t, k] = 1 if startup s is at table t in SGM k
-    x: Dict[Tuple[str, int, int], pulp.LpVariable] = {}
-    for s_id in S_ids:
-        for t in T_ids:
-            for k in K:
-                x[(s_id, t, k)] = pulp.LpVariable(
-                    f"x_{s_id}_{t}_{k}", lowBound=0, upBound=1, cat="Binary"
-                )
+    # Variables are built in bulk with LpVariable.dicts and indexed as
+    # x[s][t][k], w_os[s][m][k], w_oc[s][m][k]; names stay x_<s>_<t>_<k> etc.
 
-    # w_os[s, m, k] = 1 if startup s meets mentor m AS OS in SGM k (k in {1,2})
-    w_os: Dict[Tuple[str, str, int], pulp.LpVariable] = {}
-    for s_id in S_ids:
-        for m_id in M_ids:
-            for k in OS_SGMS:
-                w_os[(s_id, m_id, k)] = pulp.LpVariable(
-                    f"wOS_{s_id}_{m_id}_{k}", lowBound=0, upBound=1, cat="Binary"
-                )
+    # x[s, t, k] = 1 if startup s is at table t in SGM k
+    x: Dict[str, Dict[int, Dict[int, pulp.LpVariable]]] = pulp.LpVariable.dicts(
+        "x", (S_ids, T_ids, K), lowBound=0, upBound=1, cat=pulp.LpBinary
+    )
+
+    # w_os[s, m, k] = 1 if startup s meets mentor m AS OS in SGM k (k in {1,2}).
+    # Only created for OS-eligible mentors; ineligible pairs simply have no
+    # variable instead of one pinned to zero.
+    w_os: Dict[str, Dict[str, Dict[int, pulp.LpVariable]]] = pulp.LpVariable.dicts(
+        "wOS",
+        (S_ids, [m.id for m in os_eligible], OS_SGMS),
+        lowBound=0,
+        upBound=1,
+        cat=pulp.LpBinary,
+    )
 
     # w_oc[s, m, k] = 1 if startup s meets mentor m AS OC in SGM k (k in {2,3})
-    w_oc: Dict[Tuple[str, str, int], pulp.LpVariable] = {}
-    for s_id in S_ids:
-        for m_id in M_ids:
-            for k in OC_SGMS:
-                w_oc[(s_id, m_id, k)] = pulp.LpVariable(
-                    f"wOC_{s_id}_{m_id}_{k}", lowBound=0, upBound=1, cat="Binary"
-                )
-
-    # ---------- Objective: maximize OS+OC fit ----------
-    prob += pulp.lpSum(
-        mentor_fit.get((s_id, m_id), 0.0)
-        * (
-            pulp.lpSum(w_os[(s_id, m_id, k)] for k in OS_SGMS)
-            + pulp.lpSum(w_oc[(s_id, m_id, k)] for k in OC_SGMS)
-        )
-        for s_id in S_ids
-        for m_id in M_ids
-    ), "Maximize_OS_OC_Fit"
+    w_oc: Dict[str, Dict[str, Dict[int, pulp.LpVariable]]] = pulp.LpVariable.dicts(
+        "wOC",
+        (S_ids, [m.id for m in oc_eligible], OC_SGMS),
+        lowBound=0,
+        upBound=1,
+        cat=pulp.LpBinary,
+    )
 
     # ---------- Constraints ----------
 
@@ -103,7 +106,7 @@ def solve_joint_schedule(
     for s_id in S_ids:
         for k in K:
             prob += (
-                pulp.lpSum(x[(s_id, t, k)] for t in T_ids) == 1,
+                pulp.lpSum(x[s_id][t][k] for t in T_ids) == 1,
                 f"One_table_per_SGM_{s_id}_k{k}",
             )
 
@@ -111,7 +114,7 @@ def solve_joint_schedule(
     for t in T_ids:
         for k in K:
             prob += (
-                pulp.lpSum(x[(s_id, t, k)] for s_id in S_ids) <= 1,
+                pulp.lpSum(x[s_id][t][k] for s_id in S_ids) <= 1,
                 f"Table_capacity_t{t}_k{k}",
             )
 
@@ -119,80 +122,77 @@ def solve_joint_schedule(
     for s_id in S_ids:
         for t in T_ids:
             prob += (
-                pulp.lpSum(x[(s_id, t, k)] for k in K) <= 1,
+                pulp.lpSum(x[s_id][t][k] for k in K) <= 1,
                 f"At_most_one_visit_{s_id}_t{t}",
             )
 
-    # 4) Link OS meetings to seating:
-    #    If w_os[s,m,k] = 1 then s must be at mentor m's table in SGM k.
+    # Per-(s, t, k) sums of the OS / OC meeting variables of table t, built
+    # once and shared by the seating links (4, 5) and the table rule (10).
+    os_ids_at_table: Dict[int, List[str]] = {
+        t: [m.id for m in ms if m.can_be_os] for t, ms in mentors_at_table.items()
+    }
+    oc_ids_at_table: Dict[int, List[str]] = {
+        t: [m.id for m in ms if m.can_be_oc] for t, ms in mentors_at_table.items()
+    }
+    os_at_table: Dict[Tuple[str, int, int], pulp.LpAffineExpression] = {}
+    oc_at_table: Dict[Tuple[str, int, int], pulp.LpAffineExpression] = {}
     for s_id in S_ids:
-        for m_id in M_ids:
-            t_m = mentor_table[m_id]
-            m = mentor_by_id[m_id]
-
-            for k in OS_SGMS:
-                # If mentor cannot be OS, disable all w_os for them
-                if not m.can_be_os:
-                    prob += (
-                        w_os[(s_id, m_id, k)] == 0,
-                        f"OS_ineligible_{s_id}_{m_id}_{k}",
+        for t in T_ids:
+            if os_ids_at_table[t]:
+                for k in OS_SGMS:
+                    os_at_table[(s_id, t, k)] = pulp.lpSum(
+                        w_os[s_id][m_id][k] for m_id in os_ids_at_table[t]
                     )
-                else:
-                    prob += (
-                        w_os[(s_id, m_id, k)] <= x[(s_id, t_m, k)],
-                        f"Link_OS_{s_id}_{m_id}_{k}",
+            if oc_ids_at_table[t]:
+                for k in OC_SGMS:
+                    oc_at_table[(s_id, t, k)] = pulp.lpSum(
+                        w_oc[s_id][m_id][k] for m_id in oc_ids_at_table[t]
                     )
 
-    # 5) Link OC meetings to seating:
-    for s_id in S_ids:
-        for m_id in M_ids:
-            t_m = mentor_table[m_id]
-            m = mentor_by_id[m_id]
-
-            for k in OC_SGMS:
-                if not m.can_be_oc:
-                    prob += (
-                        w_oc[(s_id, m_id, k)] == 0,
-                        f"OC_ineligible_{s_id}_{m_id}_{k}",
-                    )
-                else:
-                    prob += (
-                        w_oc[(s_id, m_id, k)] <= x[(s_id, t_m, k)],
-                        f"Link_OC_{s_id}_{m_id}_{k}",
-                    )
+    # 4) Link OS meetings to seating:
+    #    If s meets any OS mentor of table t in SGM k, s must sit at t in k.
+    #    Aggregated per table: sum_{m at t} w_os[s,m,k] <= x[s,t,k]. This
+    #    implies the per-mentor rows (w >= 0) and is at least as tight,
+    #    with |S|*|T|*|K| rows instead of |S|*|M|*|K|.
+    for (s_id, t, k), os_sum in os_at_table.items():
+        prob += (
+            os_sum <= x[s_id][t][k],
+            f"Link_OS_{s_id}_t{t}_{k}",
+        )
+
+    # 5) Link OC meetings to seating (same aggregation)
+    for (s_id, t, k), oc_sum in oc_at_table.items():
+        prob += (
+            oc_sum <= x[s_id][t][k],
+            f"Link_OC_{s_id}_t{t}_{k}",
+        )
 
     # 6) Exactly one OS and one OC meeting per startup
     for s_id in S_ids:
         prob += (
-            pulp.lpSum(w_os[(s_id, m_id, k)] for m_id in M_ids for k in OS_SGMS) == 1,
+            pulp.lpSum(w_os[s_id][m.id][k] for m in os_eligible for k in OS_SGMS) == 1,
             f"One_OS_meeting_{s_id}",
         )
         prob += (
-            pulp.lpSum(w_oc[(s_id, m_id, k)] for m_id in M_ids for k in OC_SGMS) == 1,
+            pulp.lpSum(w_oc[s_id][m.id][k] for m in oc_eligible for k in OC_SGMS) == 1,
             f"One_OC_meeting_{s_id}",
         )
 
-    # 7) Same mentor cannot be both OS and OC for a startup
-    for s_id in S_ids:
-        for m_id in M_ids:
-            prob += (
-                pulp.lpSum(w_os[(s_id, m_id, k)] for k in OS_SGMS)
-                + pulp.lpSum(w_oc[(s_id, m_id, k)] for k in OC_SGMS)
-                <= 1,
-                f"OS_OC_not_same_mentor_{s_id}_{m_id}",
-            )
+    # 7) Same mentor cannot be both OS and OC for a startup:
+    #    implied by (10), since a mentor sits at exactly one table.
 
     # 8) Mentor OS/OC caps
-    for m_id in M_ids:
+    for m in os_eligible:
         prob += (
-            pulp.lpSum(w_os[(s_id, m_id, k)] for s_id in S_ids for k in OS_SGMS)
+            pulp.lpSum(w_os[s_id][m.id][k] for s_id in S_ids for k in OS_SGMS)
             <= MAX_OS_PER_MENTOR,
-            f"Mentor_OS_cap_{m_id}",
+            f"Mentor_OS_cap_{m.id}",
         )
+    for m in oc_eligible:
         prob += (
-            pulp.lpSum(w_oc[(s_id, m_id, k)] for s_id in S_ids for k in OC_SGMS)
+            pulp.lpSum(w_oc[s_id][m.id][k] for s_id in S_ids for k in OC_SGMS)
             <= MAX_OC_PER_MENTOR,
-            f"Mentor_OC_cap_{m_id}",
+            f"Mentor_OC_cap_{m.id}",
         )
 
     # 9) OS-before-OC constraint:
@@ -200,36 +200,273 @@ def solve_joint_schedule(
     #    sum_m w_oc[s,m,2] <= sum_m w_os[s,m,1]
     for s_id in S_ids:
         prob += (
-            pulp.lpSum(w_oc[(s_id, m_id, 2)] for m_id in M_ids)
-            <= pulp.lpSum(w_os[(s_id, m_id, 1)] for m_id in M_ids),
+            pulp.lpSum(w_oc[s_id][m.id][2] for m in oc_eligible)
+            <= pulp.lpSum(w_os[s_id][m.id][1] for m in os_eligible),
             f"OS_before_OC_for_{s_id}",
         )
 
-    # 10) OS and OC on different TABLES
+    # 10) OS and OC on different TABLES (this also covers rule 7).
+    #    Only tables with both OS- and OC-eligible mentors need a row; on
+    #    any other table (6) already caps the single role at 1.
     for s_id in S_ids:
         for t in T_ids:
-            # OS on table t: any mentor on t, any OS SGM
-            os_on_t = pulp.lpSum(
-                w_os[(s_id, m_id, k)]
-                for m_id in M_ids
-                if mentor_table[m_id] == t
-                for k in OS_SGMS
-            )
-            # OC on table t: any mentor on t, any OC SGM
-            oc_on_t = pulp.lpSum(
-                w_oc[(s_id, m_id, k)]
-                for m_id in M_ids
-                if mentor_table[m_id] == t
-                for k in OC_SGMS
-            )
+            if not (os_ids_at_table[t] and oc_ids_at_table[t]):
+                continue
+            # OS on table t: any OS-eligible mentor on t, any OS SGM
+            os_on_t = pulp.lpSum(os_at_table[(s_id, t, k)] for k in OS_SGMS)
+            # OC on table t: any OC-eligible mentor on t, any OC SGM
+            oc_on_t = pulp.lpSum(oc_at_table[(s_id, t, k)] for k in OC_SGMS)
 
             prob += (
                 os_on_t + oc_on_t <= 1,
                 f"OS_OC_different_tables_{s_id}_t{t}",
             )
 
+    return JointModel(prob, S_ids, x, w_os, w_oc, os_ids_at_table, oc_ids_at_table, {})
+
+
+def prune_dominated_mentors(
+    mentors: List[Mentor],
+    startups: List[Startup],
+    mentor_fit: Dict[Tuple[str, str], float],
+) -> List[Mentor]:
+    """
+    Presolve for the joint MILP: drop the OS (OC) role of every mentor
+    whose fit is <= that of another OS- (OC-) eligible mentor at the same
+    table for every startup (exact ties keep the earlier mentor). Pruned
+    mentors come back as copies with can_be_os / can_be_oc cleared, so
+    the seating and table set are unchanged; they just get no meeting
+    variables.
+
+    This keeps the optimal objective: a table hosts at most len(OS_SGMS)
+    OS and len(OC_SGMS) OC meetings a day, so while the mentor caps are
+    at least that, the dominating mentor can take over every meeting.
+    Otherwise mentors are returned as they are.
+    """
+    if MAX_OS_PER_MENTOR < len(OS_SGMS) or MAX_OC_PER_MENTOR < len(OC_SGMS):
+        return list(mentors)
+
+    s_ids = [st.id for st in startups]
+    fit = np.array(
+        _pair_fits(mentor_fit, [(s_id, m.id) for s_id in s_ids for m in mentors]),
+        dtype=np.float64,
+    ).reshape(len(s_ids), len(mentors))
+
+    cols_at_table: Dict[int, List[int]] = defaultdict(list)
+    for j, m in enumerate(mentors):
+        cols_at_table[m.table_id].append(j)
+
+    dropped = {"can_be_os": set(), "can_be_oc": set()}
+    for cols in cols_at_table.values():
+        for flag, drop in dropped.items():
+            eligible = [j for j in cols if getattr(mentors[j], flag)]
+            if len(eligible) < 2:
+                continue
+            block = fit[:, eligible]
+            # le[a, b]: mentor a fits no startup better than mentor b
+            le = (block[:, :, None] <= block[:, None, :]).all(axis=0)
+            pos = np.arange(len(eligible))
+            dominated = le & (~le.T | (pos[None, :] < pos[:, None]))
+            np.fill_diagonal(dominated, False)
+            drop.update(eligible[a] for a in np.flatnonzero(dominated.any(axis=1)).tolist())
+
+    return [
+        replace(
+            m,
+            can_be_os=m.can_be_os and j not in dropped["can_be_os"],
+            can_be_oc=m.can_be_oc and j not in dropped["can_be_oc"],
+        )
+        if j in dropped["can_be_os"] or j in dropped["can_be_oc"] else m
+        for j, m in enumerate(mentors)
+    ]
+
+
+def _cached_joint_model(mentors: List[Mentor], startups: List[Startup]) -> JointModel:
+    """
+    Return the model for this structure, building it on a cache miss. The
+    same (S, T) layout with new fit scores reuses the model and only needs
+    a new objective.
+    """
+    key = _model_key(mentors, startups)
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        model = build_joint_model(mentors, startups)
+        _MODEL_CACHE[key] = model
+        if len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+    else:
+        _MODEL_CACHE.move_to_end(key)
+    return model
+
+
+def add_lock(
+    model: JointModel,
+    startup_id: str,
+    os_id: Optional[str] = None,
+    oc_id: Optional[str] = None,
+) -> None:
+    """
+    Pin startup_id's OS and/or OC mentor in `model` (e.g. a choice the
+    interactive layer already made). A new lock for the same startup/role
+    replaces the previous one.
+
+    A lock bounds the startup's meeting variables of every other mentor of
+    that role to 0; with (6) this leaves only the locked mentor. Locks are
+    recorded in model.locks, so no constraint is ever removed from the
+    problem.
+    """
+    for role, mentor_id, w in (("OS", os_id, model.w_os), ("OC", oc_id, model.w_oc)):
+        if mentor_id is None:
+            continue
+        by_mentor = w[startup_id]
+        if mentor_id not in by_mentor:
+            raise ValueError(f"Mentor {mentor_id} cannot be {role} in this model.")
+        model.locks[f"Lock_{role}_{startup_id}"] = mentor_id
+        for m_id, by_sgm in by_mentor.items():
+            for var in by_sgm.values():
+                var.upBound = 1 if m_id == mentor_id else 0
+
+
+def _pair_fits(
+    mentor_fit: Dict[Tuple[str, str], float], pairs: List[Tuple[str, str]]
+) -> List[float]:
+    """Fit per (startup_id, mentor_id) pair, 0.0 if missing; one gather for a FitMatrix."""
+    if isinstance(mentor_fit, FitMatrix):
+        return mentor_fit.pair_scores(pairs).tolist()
+    return [float(mentor_fit.get(pair, 0.0)) for pair in pairs]
+
+
+def set_initial_assignment(
+    model: JointModel,
+    mentors: List[Mentor],
+    mentor_fit: Dict[Tuple[str, str], float],
+    os_assign: Dict[str, str],
+    oc_assign: Dict[str, str],
+) -> bool:
+    """
+    Seed `model`'s variables with a full incumbent built from a heuristic
+    OS/OC choice per startup (e.g. the startups' current os_id/oc_id), for
+    solve_joint_model(..., warm_start=True).
+
+    Startups are taken in order; each keeps its suggested mentor when
+    that mentor's cap and an OS-before-OC slot pair on its table allow,
+    else the next-best-fit eligible mentor is used; mentors excluded by
+    add_lock are never picked. The meetings are then seated with
+    solve.greedy_schedule.
+
+    Returns False, leaving the model untouched, if no incumbent is found.
+    """
+    prob, S_ids, x, w_os, w_oc, _, _, _ = model
+    if not S_ids:
+        return False
+    table_of = {m.id: m.table_id for m in mentors}
+    slot_pairs = [(k_os, k_oc) for k_os in OS_SGMS for k_oc in OC_SGMS if k_os < k_oc]
+
+    def candidates(w, s_id: str, preferred: Optional[str]) -> List[str]:
+        # Mentors ruled out by add_lock have their variables bounded to 0
+        m_ids = [
+            m_id for m_id, by_sgm in w[s_id].items()
+            if any(var.upBound != 0 for var in by_sgm.values())
+        ]
+        fits = _pair_fits(mentor_fit, [(s_id, m_id) for m_id in m_ids])
+        order = sorted(range(len(m_ids)), key=lambda j: (m_ids[j] != preferred, -fits[j]))
+        return [m_ids[j] for j in order]
+
+    taken = set()
+    os_load: Counter = Counter()
+    oc_load: Counter = Counter()
+    chosen_os: Dict[str, str] = {}
+    chosen_oc: Dict[str, str] = {}
+    for s_id in S_ids:
+        oc_cands = candidates(w_oc, s_id, oc_assign.get(s_id))
+        pick = None
+        for os_id in candidates(w_os, s_id, os_assign.get(s_id)):
+            if os_load[os_id] >= MAX_OS_PER_MENTOR:
+                continue
+            t_os = table_of[os_id]
+            for oc_id in oc_cands:
+                t_oc = table_of[oc_id]
+                if oc_load[oc_id] >= MAX_OC_PER_MENTOR or t_oc == t_os:
+                    continue
+                slots = next(
+                    (
+                        (k_os, k_oc) for k_os, k_oc in slot_pairs
+                        if (t_os, k_os) not in taken and (t_oc, k_oc) not in taken
+                    ),
+                    None,
+                )
+                if slots is not None:
+                    pick = (os_id, oc_id, slots)
+                    break
+            if pick is not None:
+                break
+        if pick is None:
+            return False
+        os_id, oc_id, (k_os, k_oc) = pick
+        taken.update({(table_of[os_id], k_os), (table_of[oc_id], k_oc)})
+        os_load[os_id] += 1
+        oc_load[oc_id] += 1
+        chosen_os[s_id], chosen_oc[s_id] = os_id, oc_id
+
+    table_os = {s_id: table_of[m_id] for s_id, m_id in chosen_os.items()}
+    table_oc = {s_id: table_of[m_id] for s_id, m_id in chosen_oc.items()}
+    seats = greedy_schedule(
+        set(S_ids), set(x[S_ids[0]]), table_os, table_oc, {}, num_sgms=len(K)
+    )
+    if seats is None:
+        return False
+
+    for s_id, by_table in x.items():
+        for t, by_sgm in by_table.items():
+            for k, var in by_sgm.items():
+                var.setInitialValue(1 if (s_id, t, k) in seats else 0)
+    for w, chosen, table_map in ((w_os, chosen_os, table_os), (w_oc, chosen_oc, table_oc)):
+        for s_id, by_mentor in w.items():
+            for m_id, by_sgm in by_mentor.items():
+                for k, var in by_sgm.items():
+                    on = m_id == chosen[s_id] and (s_id, table_map[s_id], k) in seats
+                    var.setInitialValue(1 if on else 0)
+    return True
+
+
+def solve_joint_model(
+    model: JointModel,
+    mentor_fit: Dict[Tuple[str, str], float],
+    solver: Optional[pulp.LpSolver] = None,
+    warm_start: bool = False,
+) -> Tuple[str, Dict[Tuple[str, int, int], int], Dict[str, str], Dict[str, str]]:
+    """
+    Set the fit objective on `model` and solve it.
+
+    With warm_start (and the default solver), the previous solution of this
+    model seeds the search, which pays off when re-solving after add_lock.
+
+    Returns (status, schedule, os_assign, oc_assign) as solve_joint_schedule.
+    """
+    prob, S_ids, x, w_os, w_oc, os_ids_at_table, oc_ids_at_table, _ = model
+
+    # ---------- Objective: maximize OS+OC fit ----------
+    # One fit per (s, m), gathered in one go from a FitMatrix; zero (or
+    # missing) fits add no terms
+    blocks: List[Dict[int, pulp.LpVariable]] = []
+    pairs: List[Tuple[str, str]] = []
+    for w in (w_os, w_oc):
+        for s_id, by_mentor in w.items():
+            for m_id, by_sgm in by_mentor.items():
+                blocks.append(by_sgm)
+                pairs.append((s_id, m_id))
+    fits = _pair_fits(mentor_fit, pairs)
+
+    terms: List[Tuple[pulp.LpVariable, float]] = []
+    for by_sgm, fit in zip(blocks, fits):
+        if fit != 0.0:
+            terms.extend((var, fit) for var in by_sgm.values())
+    prob.setObjective(pulp.LpAffineExpression(terms))
+    prob.objective.name = "Maximize_OS_OC_Fit"
+
     # ---------- Solve ----------
-    solver = pulp.PULP_CBC_CMD(msg=False)
+    if solver is None:
+        solver = make_solver(warm_start=warm_start)
     prob.solve(solver)
     status = pulp.LpStatus[prob.status]
 
@@ -238,36 +475,95 @@ def solve_joint_schedule(
     schedule: Dict[Tuple[str, int, int], int] = {}
 
     if status in ("Optimal", "Feasible"):
-        # Extract full schedule x
-        for s_id in S_ids:
-            for t in T_ids:
-                for k in K:
-                    val = x[(s_id, t, k)].varValue
+        # Extract full schedule x, remembering each startup's seat per SGM
+        seat: Dict[Tuple[str, int], int] = {}
+        for s_id, by_table in x.items():
+            for t, by_sgm in by_table.items():
+                for k, var in by_sgm.items():
+                    val = var.varValue
                     if val is not None and val > 0.5:
                         schedule[(s_id, t, k)] = 1
+                        seat[(s_id, k)] = t
+
+        # Extract OS/OC mentor choices (ignore SGM in this mapping).
+        # By the seating links (4, 5) a meeting in SGM k can only be with a
+        # mentor at the startup's table in k, so only those are checked.
+        for w, sgms, ids_at_table, assign in (
+            (w_os, OS_SGMS, os_ids_at_table, os_assign),
+            (w_oc, OC_SGMS, oc_ids_at_table, oc_assign),
+        ):
+            for s_id in S_ids:
+                for k in sgms:
+                    t = seat.get((s_id, k))
+                    chosen = next(
+                        (
+                            m_id
+                            for m_id in ids_at_table.get(t, ())
+                            if (w[s_id][m_id][k].varValue or 0) > 0.5
+                        ),
+                        None,
+                    )
+                    if chosen is not None:
+                        assign[s_id] = chosen
+                        break
 
-        # Extract OS/OC mentor choices (ignore SGM in this mapping)
-        for s_id in S_ids:
-            # OS mentor
-            for m_id in M_ids:
-                if any(
-                    w_os[(s_id, m_id, k)].varValue
-                    and w_os[(s_id, m_id, k)].varValue > 0.5
-                    for k in OS_SGMS
-                ):
-                    os_assign[s_id] = m_id
-                    break
+    return status, schedule, os_assign, oc_assign
 
-            # OC mentor
-            for m_id in M_ids:
-                if any(
-                    w_oc[(s_id, m_id, k)].varValue
-                    and w_oc[(s_id, m_id, k)].varValue > 0.5
-                    for k in OC_SGMS
-                ):
-                    oc_assign[s_id] = m_id
-                    break
 
+def solve_joint_schedule(
+    mentors: List[Mentor],
+    startups: List[Startup],
+    mentor_fit: Dict[Tuple[str, str], float],
+    num_sgms: int = 3,
+    solver: Optional[pulp.LpSolver] = None,
+    initial_assignment: Optional[Tuple[Dict[str, str], Dict[str, str]]] = None,
+):
+    """
+    Joint MILP:
+      - chooses OS and OC mentors for each startup
+      - chooses in which SGM (time slot) those meetings happen
+      - schedules ALL SGM table occupancy
+      - maximizes total OS+OC fit.
+
+    Rules implemented:
+      - OS can be in SGM 1 OR 2.
+      - OC can be in SGM 2 OR 3.
+      - OS must be BEFORE OC:
+            allowed combos: (OS1,OC2), (OS1,OC3), (OS2,OC3)
+            forbidden:       (OS2,OC2)
+      - Each startup has exactly:
+            * 1 OS meeting (mentor + SGM)
+            * 1 OC meeting (mentor + SGM)
+      - OS and OC must be with DIFFERENT mentors AND on DIFFERENT tables.
+      - Each startup sits at exactly ONE table per SGM.
+      - Each table hosts at most ONE startup per SGM.
+      - Each startup visits any given table at most once in the whole day.
+      - Mentor caps: MAX_OS_PER_MENTOR / MAX_OC_PER_MENTOR.
+      - No hard domain filters; compatibility is encoded in fit scores.
+
+    `solver` defaults to make_solver() (HiGHS if available, else
+    multi-threaded CBC). The constraint structure is cached per
+    (startups, mentor tables/roles) layout, so repeated calls with new
+    fit scores only rebuild the objective. To lock some choices and
+    re-solve, use build_joint_model + add_lock + solve_joint_model.
+
+    initial_assignment=(os_assign, oc_assign), startup id -> mentor id,
+    warm-starts the solver from an incumbent built around that heuristic
+    choice (see set_initial_assignment); if none is found the solve
+    starts cold.
+    """
+
+    assert num_sgms == 3, "This formulation assumes exactly 3 SGMs (1,2,3)."
+
+    model = _cached_joint_model(mentors, startups)
+    warm_start = initial_assignment is not None and set_initial_assignment(
+        model, mentors, mentor_fit, *initial_assignment
+    )
+    status, schedule, os_assign, oc_assign = solve_joint_model(
+        model, mentor_fit, solver=solver, warm_start=warm_start
+    )
+
+    if status in ("Optimal", "Feasible"):
         # Write OS/OC back into Startup objects
         for st in startups:
             if st.id in os_assign:
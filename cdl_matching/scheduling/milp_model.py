@@ -1,7 +1,8 @@
 # cdl_matching/scheduling/milp_model.py
 from __future__ import annotations
 
-from typing import Set, Dict, Tuple
+from collections import defaultdict
+from typing import Set, Dict, List, Optional, Tuple
 import pulp
 
 
@@ -10,8 +11,9 @@ def build_milp_schedule_model(
     T: Set[int],
     table_os: Dict[str, int],
     table_oc: Dict[str, int],
-    table_fit: Dict[Tuple[str, int], float],
+    table_fit: Optional[Dict[Tuple[str, int], float]] = None,
     num_sgms: int = 3,
+    allowed_pairs: Optional[Set[Tuple[str, int]]] = None,
 ) -> Tuple[pulp.LpProblem, Dict[Tuple[str, int, int], pulp.LpVariable]]:
     """
     MILP for scheduling startups over SGMs with OS-before-OC, now with fit scores.
@@ -24,7 +26,8 @@ def build_milp_schedule_model(
             sum_{s in S} sum_{t in T} sum_{k} table_fit[s,t] * x[s,t,k]
 
         where table_fit[(s, t)] is typically derived from the best-fit mentor
-        at table t for startup s.
+        at table t for startup s. With table_fit=None the objective is empty
+        and the model is a pure feasibility problem.
 
     Rules encoded:
 
@@ -46,6 +49,11 @@ def build_milp_schedule_model(
       6) OC allowed only in SGM2 or SGM3 (not SGM1):
            ∀s, k ∉ {2,3}: x[s, table_oc[s], k] = 0
 
+         (5) and (6) are encoded by never creating those x variables, so
+         the returned x dict is sparse over the allowed (s, t, k).
+         With allowed_pairs, x is further restricted to those (s, t);
+         pairs outside it can never be seated.
+
       7) OS must be strictly before OC in SGM index.
          Given allowed SGMs, the only forbidden pattern is:
            OS in SGM2 AND OC in SGM2.
@@ -60,21 +68,36 @@ def build_milp_schedule_model(
     prob = pulp.LpProblem("CDL_SGM_Scheduling", pulp.LpMaximize)
 
     # ---------- Decision variables ----------
+    # Slots ruled out by (5)/(6) get no variable at all
+    forbidden: Set[Tuple[str, int, int]] = set()
+    for s in S:
+        forbidden.update((s, table_os[s], k) for k in sgms if k not in (1, 2))
+        forbidden.update((s, table_oc[s], k) for k in sgms if k not in (2, 3))
+
     x: Dict[Tuple[str, int, int], pulp.LpVariable] = {}
     for s in S:
         for t in T:
+            if allowed_pairs is not None and (s, t) not in allowed_pairs:
+                continue
             for k in sgms:
+                if (s, t, k) in forbidden:
+                    continue
                 x[(s, t, k)] = pulp.LpVariable(
                     f"x_{s}_{t}_{k}", lowBound=0, upBound=1, cat="Binary"
                 )
 
     # ---------- Objective: maximize total fit ----------
-    prob += pulp.lpSum(
-        table_fit.get((s, t), 0.0) * x[(s, t, k)]
-        for s in S
-        for t in T
-        for k in sgms
-    ), "MaximizeTotalFit"
+    set_fit_objective(prob, x, table_fit)
+
+    # Bucket x once per constraint family; x is ordered s, t, k, so each
+    # bucket lists its variables in the same order as a direct scan would
+    by_s_k: Dict[Tuple[str, int], List[Tuple[pulp.LpVariable, int]]] = defaultdict(list)
+    by_t_k: Dict[Tuple[int, int], List[Tuple[pulp.LpVariable, int]]] = defaultdict(list)
+    by_s_t: Dict[Tuple[str, int], List[Tuple[pulp.LpVariable, int]]] = defaultdict(list)
+    for (s, t, k), var in x.items():
+        by_s_k[(s, k)].append((var, 1))
+        by_t_k[(t, k)].append((var, 1))
+        by_s_t[(s, t)].append((var, 1))
 
     # ---------- Constraints ----------
 
@@ -82,7 +105,7 @@ def build_milp_schedule_model(
     for s in S:
         for k in sgms:
             prob += (
-                pulp.lpSum(x[(s, t, k)] for t in T) == 1,
+                pulp.LpAffineExpression(by_s_k.get((s, k), [])) == 1,
                 f"OneTablePerSGM_s_{s}_k_{k}",
             )
 
@@ -90,45 +113,25 @@ def build_milp_schedule_model(
     for t in T:
         for k in sgms:
             prob += (
-                pulp.lpSum(x[(s, t, k)] for s in S) <= 1,
+                pulp.LpAffineExpression(by_t_k.get((t, k), [])) <= 1,
                 f"TableCapacity_t_{t}_k_{k}",
             )
 
     # (3) Exactly one OS meeting at OS table for each startup
     for s in S:
-        os_table = table_os[s]
         prob += (
-            pulp.lpSum(x[(s, os_table, k)] for k in sgms) == 1,
+            pulp.LpAffineExpression(by_s_t.get((s, table_os[s]), [])) == 1,
             f"OS_once_s_{s}",
         )
 
     # (4) Exactly one OC meeting at OC table for each startup
     for s in S:
-        oc_table = table_oc[s]
         prob += (
-            pulp.lpSum(x[(s, oc_table, k)] for k in sgms) == 1,
+            pulp.LpAffineExpression(by_s_t.get((s, table_oc[s]), [])) == 1,
             f"OC_once_s_{s}",
         )
 
-    # (5) OS allowed only in SGM1 or SGM2   (k != 1,2 → x=0 at OS table)
-    for s in S:
-        os_table = table_os[s]
-        for k in sgms:
-            if k not in (1, 2):
-                prob += (
-                    x[(s, os_table, k)] == 0,
-                    f"OS_not_allowed_s_{s}_k_{k}",
-                )
-
-    # (6) OC allowed only in SGM2 or SGM3   (k != 2,3 → x=0 at OC table)
-    for s in S:
-        oc_table = table_oc[s]
-        for k in sgms:
-            if k not in (2, 3):
-                prob += (
-                    x[(s, oc_table, k)] == 0,
-                    f"OC_not_allowed_s_{s}_k_{k}",
-                )
+    # (5), (6): handled by the sparse x above
 
     # (7) OS strictly before OC: forbid OS=2 & OC=2
     #     (given OS∈{1,2} and OC∈{2,3}, this is the only bad combo)
@@ -137,8 +140,30 @@ def build_milp_schedule_model(
             os_table = table_os[s]
             oc_table = table_oc[s]
             prob += (
-                x[(s, os_table, 2)] + x[(s, oc_table, 2)] <= 1,
+                x.get((s, os_table, 2), 0) + x.get((s, oc_table, 2), 0) <= 1,
                 f"OS_before_OC_s_{s}",
             )
 
     return prob, x
+
+
+def set_fit_objective(
+    prob: pulp.LpProblem,
+    x: Dict[Tuple[str, int, int], pulp.LpVariable],
+    table_fit: Optional[Dict[Tuple[str, int], float]],
+) -> None:
+    """
+    (Re)set the objective of a model from build_milp_schedule_model, so a
+    built model can be re-solved with new fit scores. table_fit=None
+    leaves an empty (feasibility) objective.
+    """
+    # Built straight from (var, coefficient) pairs, which skips the
+    # per-term expression objects of `coef * var` / lpSum
+    if table_fit is None:
+        objective = pulp.LpAffineExpression()
+    else:
+        objective = pulp.LpAffineExpression(
+            [(var, table_fit.get((s, t), 0.0)) for (s, t, _k), var in x.items()]
+        )
+    prob.setObjective(objective)
+    prob.objective.name = "MaximizeTotalFit"
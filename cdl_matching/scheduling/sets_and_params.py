@@ -1,25 +1,72 @@
 # cdl_matching/scheduling/sets_and_params.py
 from __future__ import annotations
-from typing import List, Dict, Set, Tuple
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Set, Tuple
 from ..models import Mentor, Startup
 
+# (mentor id, table id) per mentor, in mentor order
+MentorLayout = Tuple[Tuple[str, int], ...]
+
+
+class SetsAndParams(NamedTuple):
+    """
+    Index sets and OS/OC table parameters for one mentors/startups state.
+    Unpacks like the plain (S, T, table_os, table_oc) tuple.
+    """
+    S: Set[str]                 # startup IDs
+    T: Set[int]                 # table IDs
+    table_os: Dict[str, int]    # startup -> OS table
+    table_oc: Dict[str, int]    # startup -> OC table
+
+
+def _mentor_layout(mentors: List[Mentor]) -> MentorLayout:
+    return tuple((m.id, m.table_id) for m in mentors)
+
+
+@lru_cache(maxsize=16)
+def _mentor_index(
+    layout: MentorLayout,
+) -> Tuple[Dict[str, int], Dict[int, Tuple[str, ...]]]:
+    """
+    (mentor_table, mentors_by_table) for a mentor layout:
+      mentor_table: mentor id -> table id
+      mentors_by_table: table id -> mentor ids, tables in first-seen order
+
+    Cached per layout, so the maps are shared: treat them as read-only.
+    """
+    mentor_table: Dict[str, int] = dict(layout)
+    grouped: Dict[int, List[str]] = defaultdict(list)
+    for m_id, t in layout:
+        grouped[t].append(m_id)
+    mentors_by_table = {t: tuple(ids) for t, ids in grouped.items()}
+    return mentor_table, mentors_by_table
+
 
 def build_sets_and_params(
     mentors: List[Mentor],
     startups: List[Startup],
-) -> Tuple[Set[str], Set[int], Dict[str, int], Dict[str, int]]:
+) -> SetsAndParams:
     """
     Build:
       S: set of startup IDs
       T: set of table IDs
       table_os: startup -> OS table
       table_oc: startup -> OC table
-    """
-    S = {st.id for st in startups}
-    T = {m.table_id for m in mentors}
 
+    Compute it once per mentors/startups state and pass it to
+    analyze_session_feasibility / solve_schedule via `sets_and_params`.
+
+    The mentor-side maps are cached (_mentor_index); the result itself is
+    not, since startups' os_id/oc_id change between calls and
+    apply_move_to_diagnostics patches table_os/table_oc in place, so a
+    shared cached instance could go stale. Thread it through instead.
+    """
     # Map mentor -> table
-    mentor_table: Dict[str, int] = {m.id: m.table_id for m in mentors}
+    mentor_table, mentors_by_table = _mentor_index(_mentor_layout(mentors))
+
+    S = {st.id for st in startups}
+    T = set(mentors_by_table)
 
     table_os: Dict[str, int] = {}
     table_oc: Dict[str, int] = {}
@@ -39,4 +86,4 @@ def build_sets_and_params(
         table_os[st.id] = mentor_table[st.os_id]
         table_oc[st.id] = mentor_table[st.oc_id]
 
-    return S, T, table_os, table_oc
+    return SetsAndParams(S, T, table_os, table_oc)
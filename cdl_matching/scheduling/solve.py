@@ -1,73 +1,365 @@
 # cdl_matching/scheduling/solve.py
 from __future__ import annotations
 
-from typing import List, Tuple, Dict
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import List, Tuple, Dict, Optional, Set
 
+import numpy as np
 import pulp
 
-from ..models import Mentor, Startup
-from .sets_and_params import build_sets_and_params
-from .milp_model import build_milp_schedule_model
+from ..models import FitMatrix, Mentor, Startup
+from .sets_and_params import (
+    MentorLayout,
+    SetsAndParams,
+    _mentor_index,
+    _mentor_layout,
+    build_sets_and_params,
+)
+from .milp_model import build_milp_schedule_model, set_fit_objective
+from .solvers import make_solver
+
+
+# Table fits cached per FitMatrix, keyed by mentor seating + startup ids
+_TABLE_FIT_CACHE_SIZE = 8
+
+# Built schedule models kept for re-solving, keyed by structure (see
+# _schedule_model_key); only the objective changes between solves
+_MODEL_CACHE_SIZE = 8
+_MODEL_CACHE: "OrderedDict[Tuple, Tuple[pulp.LpProblem, Dict]]" = OrderedDict()
 
 
 def _build_table_fit(
     mentors: List[Mentor],
     startups: List[Startup],
-    mentor_fit: Dict[Tuple[str, str], float],
+    mentor_fit: Mapping[Tuple[str, str], float],
 ) -> Dict[Tuple[str, int], float]:
     """
     Aggregate mentor-level fit to table-level fit:
     table_fit[(startup_id, table_id)] = best mentor fit on that table.
+
+    Results for a FitMatrix are cached on that matrix (treated as
+    read-only) per (mentor id, table id) layout and startup ids, so
+    printing and solving the same session aggregate once. Callers get
+    their own copy of the dict.
+    """
+    layout = _mentor_layout(mentors)
+    if not isinstance(mentor_fit, FitMatrix):
+        return _aggregate_table_fit(layout, startups, mentor_fit)
+
+    key = (layout, tuple(st.id for st in startups))
+    cache = mentor_fit._derived.setdefault("table_fit", OrderedDict())
+    table_fit = cache.get(key)
+    if table_fit is None:
+        table_fit = cache[key] = _aggregate_table_fit(layout, startups, mentor_fit)
+        if len(cache) > _TABLE_FIT_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return dict(table_fit)
+
+
+def _aggregate_table_fit(
+    layout: MentorLayout,
+    startups: List[Startup],
+    mentor_fit: Mapping[Tuple[str, str], float],
+) -> Dict[Tuple[str, int], float]:
+    """
+    Uncached body of _build_table_fit, for a (mentor id, table id) layout.
+
+    The fit is pulled into one dense startup x mentor block (float32 when
+    mentor_fit is a FitMatrix) with mentor columns grouped by table, and
+    the per-table max is a single np.maximum.reduceat over those groups.
     """
-    mentors_by_table: Dict[int, List[Mentor]] = {}
-    for m in mentors:
-        mentors_by_table.setdefault(m.table_id, []).append(m)
+    if not layout or not startups:
+        return {}
+
+    # Tables in first-seen order; mentor columns grouped by table
+    _, mentors_by_table = _mentor_index(layout)
+    table_ids = list(mentors_by_table)
+    sizes = [len(ids) for ids in mentors_by_table.values()]
+    offsets = np.concatenate(([0], np.cumsum(sizes[:-1]))).astype(np.intp)
+
+    startup_ids = [st.id for st in startups]
+    mentor_cols = [m_id for ids in mentors_by_table.values() for m_id in ids]
+    if isinstance(mentor_fit, FitMatrix):
+        block = mentor_fit.submatrix(startup_ids, mentor_cols)
+        if np.isnan(block).any():
+            i, j = np.argwhere(np.isnan(block))[0].tolist()
+            raise KeyError((startup_ids[i], mentor_cols[j]))
+    else:
+        # Plain dicts keep their float64 values
+        block = np.array(
+            [[mentor_fit[(sid, mid)] for mid in mentor_cols] for sid in startup_ids],
+            dtype=np.float64,
+        )
+
+    best = np.maximum.reduceat(block, offsets, axis=1).tolist()
+    return {
+        (sid, t): row[pos]
+        for sid, row in zip(startup_ids, best)
+        for pos, t in enumerate(table_ids)
+    }
+
+
+def greedy_schedule(
+    S: Set[str],
+    T: Set[int],
+    table_os: Dict[str, int],
+    table_oc: Dict[str, int],
+    table_fit: Dict[Tuple[str, int], float],
+    num_sgms: int = 3,
+    max_steps: int = 10_000,
+    allowed_pairs: Optional[Set[Tuple[str, int]]] = None,
+) -> Optional[Set[Tuple[str, int, int]]]:
+    """
+    Quick feasible schedule used to warm-start the MILP (and the joint
+    model, see joint_milp.set_initial_assignment), as a set of
+    (startup_id, table_id, sgm) seats, or None if none is found cheaply.
+
+    1) OS/OC seats: a depth-first search (at most `max_steps` nodes) picks
+       an (OS SGM, OC SGM) pair with OS before OC for every startup so no
+       table hosts two meetings in one SGM.
+    2) Other SGMs: per SGM, a bipartite matching of the startups still
+       without a seat to free tables that are neither their OS nor their
+       OC table (and are in allowed_pairs, if given), trying higher
+       table_fit first.
+    """
+    role_slots = [
+        (k_os, k_oc)
+        for k_os in (1, 2)
+        for k_oc in (2, 3)
+        if k_os < k_oc <= num_sgms
+    ]
+    startups = sorted(S)
+    if any(table_os[s] == table_oc[s] for s in startups):
+        return None
+
+    # ---------- 1) OS/OC seats ----------
+    # Depth-first search with an explicit stack (no recursion, so large
+    # sessions cannot hit the recursion limit): chosen[i] is the
+    # role_slots index used for startups[i]; `nxt` is the first index
+    # still to try for startups[len(chosen)].
+    taken: Dict[Tuple[int, int], str] = {}
+    plan: Dict[str, Dict[int, int]] = {}
+    chosen: List[int] = []
+    nxt = 0
+    steps = 0
+    while len(chosen) < len(startups):
+        if nxt == 0:
+            steps += 1
+            if steps > max_steps:
+                return None
+        s = startups[len(chosen)]
+        os_t, oc_t = table_os[s], table_oc[s]
+        for j in range(nxt, len(role_slots)):
+            k_os, k_oc = role_slots[j]
+            os_seat, oc_seat = (os_t, k_os), (oc_t, k_oc)
+            if os_seat in taken or oc_seat in taken:
+                continue
+            taken[os_seat] = taken[oc_seat] = s
+            plan[s] = {k_os: os_t, k_oc: oc_t}
+            chosen.append(j)
+            nxt = 0
+            break
+        else:
+            # No slot pair left for s: undo the previous startup's choice
+            if not chosen:
+                return None
+            j = chosen.pop()
+            s = startups[len(chosen)]
+            k_os, k_oc = role_slots[j]
+            del taken[(table_os[s], k_os)], taken[(table_oc[s], k_oc)], plan[s]
+            nxt = j + 1
+
+    # ---------- 2) Remaining SGMs ----------
+    tables = sorted(T)
+    for k in range(1, num_sgms + 1):
+        seated: Dict[int, str] = {}  # table -> startup, this SGM only
+
+        def options(s: str, seen: Set[int]) -> List[int]:
+            opts = [
+                t for t in tables
+                if t != table_os[s] and t != table_oc[s]
+                and (t, k) not in taken and t not in seen
+                and (allowed_pairs is None or (s, t) in allowed_pairs)
+            ]
+            opts.sort(key=lambda t: -table_fit.get((s, t), 0.0))
+            return opts
 
-    table_fit: Dict[Tuple[str, int], float] = {}
+        def seat(root: str) -> bool:
+            """Augmenting-path search for `root`, with an explicit stack."""
+            seen: Set[int] = set()
+            # Frames are [startup, its table options, next option to try]
+            stack = [[root, options(root, seen), 0]]
+            while stack:
+                frame = stack[-1]
+                s, opts, idx = frame
+                if idx == len(opts):
+                    stack.pop()
+                    continue
+                t = opts[idx]
+                frame[2] += 1
+                seen.add(t)
+                if t in seated:
+                    stack.append([seated[t], options(seated[t], seen), 0])
+                    continue
+                # Free table: shift every startup on the path to the table it tried
+                for fs, fopts, fidx in stack:
+                    seated[fopts[fidx - 1]] = fs
+                return True
+            return False
 
-    for st in startups:
-        for table_id, m_list in mentors_by_table.items():
-            scores = [mentor_fit[(st.id, m.id)] for m in m_list]
-            table_fit[(st.id, table_id)] = max(scores) if scores else 0.0
+        for s in startups:
+            if k not in plan[s] and not seat(s):
+                return None
+        for t, s in seated.items():
+            plan[s][k] = t
 
-    return table_fit
+    return {(s, t, k) for s, seats in plan.items() for k, t in seats.items()}
 
 
 def solve_schedule(
     mentors: List[Mentor],
     startups: List[Startup],
-    mentor_fit: Dict[Tuple[str, str], float],
+    mentor_fit: Optional[Mapping[Tuple[str, str], float]] = None,
     num_sgms: int = 3,
+    sets_and_params: Optional[SetsAndParams] = None,
+    solver_name: Optional[str] = None,
+    min_table_fit: Optional[float] = None,
 ) -> Tuple[str, Dict[Tuple[str, int, int], int]]:
     """
     Solve the schedule MILP and return (status, solution_dict).
+
+    With mentor_fit=None no table fit is built and the MILP only checks
+    feasibility (any valid schedule is returned).
+
+    Pass sets_and_params (e.g. diag["sets_and_params"]) to reuse sets
+    already built for the same mentors/startups. solver_name ("highs" or
+    "cbc") picks the solver; by default HiGHS is used when available,
+    falling back to CBC (see make_solver).
+
+    min_table_fit (off by default) prunes the model: a startup is only
+    seated at its OS/OC tables and at tables whose fit exceeds the
+    threshold. This shrinks the MILP a lot when most pairs fit poorly,
+    but it is a heuristic: the result is optimal for the pruned model
+    only. If pruning makes the model infeasible, the full model is solved.
     """
 
     # Sets and OS/OC tables from startups
-    S, T, table_os, table_oc = build_sets_and_params(mentors, startups)
+    if sets_and_params is None:
+        sets_and_params = build_sets_and_params(mentors, startups)
+    S, T, table_os, table_oc = sets_and_params
 
     # Table-level fit scores for MILP objective
-    table_fit = _build_table_fit(mentors, startups, mentor_fit)
-
-    prob, x = build_milp_schedule_model(
-        S=S,
-        T=T,
-        table_os=table_os,
-        table_oc=table_oc,
-        table_fit=table_fit,
-        num_sgms=num_sgms,
+    table_fit = (
+        None if mentor_fit is None
+        else _build_table_fit(mentors, startups, mentor_fit)
+    )
+
+    if min_table_fit is not None and table_fit is not None:
+        allowed_pairs = {pair for pair, fit in table_fit.items() if fit > min_table_fit}
+        allowed_pairs.update(table_os.items())
+        allowed_pairs.update(table_oc.items())
+        status, sol = _solve_model(
+            sets_and_params, table_fit, num_sgms, solver_name, allowed_pairs
+        )
+        if status != "Infeasible":
+            return status, sol
+
+    return _solve_model(sets_and_params, table_fit, num_sgms, solver_name)
+
+
+def _schedule_model_key(
+    sets_and_params: SetsAndParams,
+    num_sgms: int,
+    allowed_pairs: Optional[Set[Tuple[str, int]]],
+    feasibility_only: bool,
+) -> Tuple:
+    """
+    Everything the constraints of the schedule MILP depend on. Feasibility
+    models are kept apart: PuLP registers a dummy column on a model solved
+    with an empty objective, which a later MPS export of the same model
+    with a real objective would then refer to.
+    """
+    S, T, table_os, table_oc = sets_and_params
+    return (
+        frozenset(S),
+        frozenset(T),
+        frozenset(table_os.items()),
+        frozenset(table_oc.items()),
+        num_sgms,
+        None if allowed_pairs is None else frozenset(allowed_pairs),
+        feasibility_only,
+    )
+
+
+def _cached_schedule_model(
+    sets_and_params: SetsAndParams,
+    num_sgms: int,
+    allowed_pairs: Optional[Set[Tuple[str, int]]] = None,
+    feasibility_only: bool = False,
+) -> Tuple[pulp.LpProblem, Dict[Tuple[str, int, int], pulp.LpVariable]]:
+    """
+    Return the (prob, x) model for this structure, building it on a cache
+    miss. Sweeps over fit scores for the same sessions (and each num_sgms
+    seen) then skip PuLP's model construction; the caller sets the
+    objective with set_fit_objective.
+    """
+    key = _schedule_model_key(
+        sets_and_params, num_sgms, allowed_pairs, feasibility_only
+    )
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        S, T, table_os, table_oc = sets_and_params
+        model = build_milp_schedule_model(
+            S=S,
+            T=T,
+            table_os=table_os,
+            table_oc=table_oc,
+            num_sgms=num_sgms,
+            allowed_pairs=allowed_pairs,
+        )
+        _MODEL_CACHE[key] = model
+        if len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+    else:
+        _MODEL_CACHE.move_to_end(key)
+    return model
+
+
+def _solve_model(
+    sets_and_params: SetsAndParams,
+    table_fit: Optional[Dict[Tuple[str, int], float]],
+    num_sgms: int,
+    solver_name: Optional[str],
+    allowed_pairs: Optional[Set[Tuple[str, int]]] = None,
+) -> Tuple[str, Dict[Tuple[str, int, int], int]]:
+    """Build, warm-start and solve one schedule MILP; see solve_schedule."""
+    S, T, table_os, table_oc = sets_and_params
+
+    prob, x = _cached_schedule_model(
+        sets_and_params, num_sgms, allowed_pairs, feasibility_only=table_fit is None
+    )
+    set_fit_objective(prob, x, table_fit)
+
+    # Hand the solver a greedy incumbent so branch-and-bound can prune early
+    start = greedy_schedule(
+        S, T, table_os, table_oc, table_fit or {}, num_sgms,
+        allowed_pairs=allowed_pairs,
     )
+    if start is not None:
+        for key, var in x.items():
+            var.setInitialValue(1 if key in start else 0)
 
-    solver = pulp.PULP_CBC_CMD(msg=False)
+    solver = make_solver(solver_name, warm_start=start is not None)
     prob.solve(solver)
 
     status = pulp.LpStatus[prob.status]
 
+    # One pass over x; the solver has already filled every varValue
     sol: Dict[Tuple[str, int, int], int] = {}
     if status in ("Optimal", "Feasible"):
-        for key, var in x.items():
-            val = var.varValue
-            if val is not None and val > 0.5:
-                sol[key] = 1
+        sol = {key: 1 for key, var in x.items() if (var.varValue or 0) > 0.5}
 
     return status, sol
@@ -0,0 +1,35 @@
+# cdl_matching/scheduling/solvers.py
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import pulp
+
+from cdl_matching.config import MILP_SOLVER, MILP_TIME_LIMIT
+
+
+def make_solver(name: Optional[str] = None, warm_start: bool = False) -> pulp.LpSolver:
+    """
+    Solver for the scheduling MILPs: HiGHS when its binary is available,
+    otherwise CBC on all but one core.
+
+    `name` ("highs" or "cbc") forces one; when it is None the
+    CDL_MILP_SOLVER environment variable, then config.MILP_SOLVER, decide.
+    With warm_start, the solver starts from the variables' current values.
+    """
+    choice = (name or os.environ.get("CDL_MILP_SOLVER") or MILP_SOLVER or "").lower()
+    if choice not in ("", "highs", "cbc"):
+        raise ValueError(f"Unknown MILP solver {choice!r}; expected 'highs' or 'cbc'.")
+    if choice != "cbc":
+        highs = pulp.HiGHS_CMD(
+            msg=False, timeLimit=MILP_TIME_LIMIT, warmStart=warm_start
+        )
+        if choice == "highs" or highs.available():
+            return highs
+    return pulp.PULP_CBC_CMD(
+        msg=False,
+        threads=max(1, (os.cpu_count() or 1) - 1),
+        timeLimit=MILP_TIME_LIMIT,
+        warmStart=warm_start,
+    )
@@ -1,10 +1,64 @@
 # cdl_matching/scheduling/toy_mapping.py
 from __future__ import annotations
 
-from typing import List, Dict, Tuple
-from collections import defaultdict
+import importlib.util
+from typing import List, Dict, Optional, Tuple
 import random
 
+import numpy as np
+
+
+_HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+if _HAS_NUMBA:
+    import numba
+
+    _jit = numba.njit(cache=True)
+else:
+    def _jit(func):
+        return func
+
+
+@_jit
+def _assign_os_oc_kernel(n_startups, n_tables, max_os, max_oc, max_total):
+    """
+    Greedy OS-then-OC table choice for startups 0..n_startups-1, in order,
+    over table positions 0..n_tables-1: each pick is the least-loaded table
+    with spare capacity (first one on ties), and OC avoids the OS table.
+
+    Returns (os_idx, oc_idx, failed, failed_role): the chosen table
+    positions, plus the first startup that could not be placed (-1 if all
+    were) and the role it failed on (0 = OS, 1 = OC).
+
+    Integer arrays only, so it compiles with numba when that is installed.
+    """
+    os_count = np.zeros(n_tables, dtype=np.int32)
+    oc_count = np.zeros(n_tables, dtype=np.int32)
+    os_idx = np.full(n_startups, -1, dtype=np.int32)
+    oc_idx = np.full(n_startups, -1, dtype=np.int32)
+    blocked = np.int32(2147483647)
+
+    for i in range(n_startups):
+        load = os_count + oc_count
+        mask = (os_count < max_os) & (load < max_total)
+        if not mask.any():
+            return os_idx, oc_idx, i, 0
+        chosen = np.argmin(np.where(mask, load, blocked))
+        os_idx[i] = chosen
+        os_count[chosen] += 1
+
+    for i in range(n_startups):
+        load = os_count + oc_count
+        mask = (oc_count < max_oc) & (load < max_total)
+        mask[os_idx[i]] = False
+        if not mask.any():
+            return os_idx, oc_idx, i, 1
+        chosen = np.argmin(np.where(mask, load, blocked))
+        oc_idx[i] = chosen
+        oc_count[chosen] += 1
+
+    return os_idx, oc_idx, -1, 0
+
 
 def build_safe_os_oc_mapping(
     startup_ids: List[str],
@@ -12,6 +66,7 @@ def build_safe_os_oc_mapping(
     num_sgms: int = 3,
     os_sgms_allowed: Tuple[int, ...] = (1, 2),
     oc_sgms_allowed: Tuple[int, ...] = (2, 3),
+    seed: Optional[int] = None,
 ) -> Tuple[Dict[str, int], Dict[str, int]]:
     """
     Construct OS/OC table mappings for a toy instance such that:
@@ -26,66 +81,54 @@ def build_safe_os_oc_mapping(
 
     This guarantees that the structural checks and MILP won't fail due to
     pure capacity reasons on the toy instance (10 startups, 10 tables, etc.).
+
+    The startup order is shuffled with a local random.Random(seed), so the
+    global random state is never touched.
     """
     max_os_per_table = len(os_sgms_allowed)   # 2
     max_oc_per_table = len(oc_sgms_allowed)   # 2
     max_total_per_table = num_sgms            # 3
 
-    os_count = defaultdict(int)
-    oc_count = defaultdict(int)
-
-    table_os: Dict[str, int] = {}
-    table_oc: Dict[str, int] = {}
+    tables = list(tables)
+    n_tables = len(tables)
 
     # Shuffle startups to avoid always hitting the same pattern
+    rng = random.Random(seed)
     shuffled_startups = list(startup_ids)
-    random.shuffle(shuffled_startups)
-
-    # ---------- 1) Assign OS tables ----------
-    for s in shuffled_startups:
-        # candidate tables with spare OS capacity and total capacity
-        candidates = [
-            t for t in tables
-            if os_count[t] < max_os_per_table
-            and (os_count[t] + oc_count[t]) < max_total_per_table
-        ]
-        if not candidates:
+    rng.shuffle(shuffled_startups)
+
+    # ---------- 1) OS tables, 2) OC tables (different from OS) ----------
+    os_idx, oc_idx, failed, failed_role = _assign_os_oc_kernel(
+        len(shuffled_startups),
+        n_tables,
+        max_os_per_table,
+        max_oc_per_table,
+        max_total_per_table,
+    )
+    if failed >= 0:
+        if failed_role == 0:
             raise RuntimeError(
                 "Unable to assign OS table without exceeding per-table capacity. "
                 "Try more tables or fewer startups in the toy generator."
             )
-
-        # choose table with smallest current load to balance
-        candidates.sort(key=lambda t: os_count[t] + oc_count[t])
-        chosen = candidates[0]
-        table_os[s] = chosen
-        os_count[chosen] += 1
-
-    # ---------- 2) Assign OC tables (different from OS) ----------
-    for s in shuffled_startups:
-        os_table = table_os[s]
-
-        candidates = [
-            t for t in tables
-            if t != os_table
-            and oc_count[t] < max_oc_per_table
-            and (os_count[t] + oc_count[t]) < max_total_per_table
-        ]
-        if not candidates:
-            raise RuntimeError(
-                f"Unable to assign OC table for startup {s} without exceeding "
-                "per-table capacity. Try more tables or fewer startups."
-            )
-
-        candidates.sort(key=lambda t: os_count[t] + oc_count[t])
-        chosen = candidates[0]
-        table_oc[s] = chosen
-        oc_count[chosen] += 1
+        raise RuntimeError(
+            f"Unable to assign OC table for startup {shuffled_startups[failed]} "
+            "without exceeding per-table capacity. Try more tables or fewer startups."
+        )
+
+    table_os: Dict[str, int] = {
+        s: tables[i] for s, i in zip(shuffled_startups, os_idx.tolist())
+    }
+    table_oc: Dict[str, int] = {
+        s: tables[i] for s, i in zip(shuffled_startups, oc_idx.tolist())
+    }
+    os_count = np.bincount(os_idx, minlength=n_tables)
+    oc_count = np.bincount(oc_idx, minlength=n_tables)
 
     # Final sanity check (paranoid but useful)
-    for t in tables:
-        os_c = os_count[t]
-        oc_c = oc_count[t]
+    for i, t in enumerate(tables):
+        os_c = int(os_count[i])
+        oc_c = int(oc_count[i])
         if os_c > max_os_per_table or oc_c > max_oc_per_table or (os_c + oc_c) > max_total_per_table:
             raise RuntimeError(
                 f"Post-check failed for table {t}: OS={os_c}, OC={oc_c}, "
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
-import random
+from collections import defaultdict
 
+import numpy as np
+
+from cdl_matching.models import FitMatrix
 from cdl_matching.scheduling.interactive_repair import interactive_build_session
 from cdl_matching.scheduling.solve import solve_schedule
 from cdl_matching.scheduling.diagnostics import analyze_session_feasibility
@@ -19,24 +22,27 @@ def main():
     num_startups = len(startups)
 
     # Precompute: table -> mentors at that table (by ID; change to .name if you prefer)
-    table_to_mentors = {}
+    table_to_mentors = defaultdict(list)
     for m in mentors:
-        table_to_mentors.setdefault(m.table_id, []).append(m.name)
-    # sort mentors per table for nicer output
-    for t in table_to_mentors:
-        table_to_mentors[t].sort()
+        table_to_mentors[m.table_id].append(m.name)
+    # sort mentors per table for nicer output; each table's label is
+    # joined once here rather than once per SGM in the schedule printout
+    mentor_labels = {
+        t: ", ".join(sorted(names)) for t, names in table_to_mentors.items()
+    }
 
     print("\n========== SESSION SUMMARY ==========")
     print(f"- Number of tables   : {num_tables}")
     print(f"- Number of startups : {num_startups}")
 
-    # 1b) Build random mentor–startup fit scores in [0, 1]
-    # Key: (startup_id, mentor_id) -> float
-    rng = random.Random(42)  # fixed seed for reproducibility; change/remove if you want
-    mentor_fit = {}
-    for st in startups:
-        for m in mentors:
-            mentor_fit[(st.id, m.id)] = rng.random()
+    # 1b) Build random mentor–startup fit scores in [0, 1)
+    # Drawn as one float32 block; mentor_fit[(startup_id, mentor_id)] -> float
+    rng = np.random.default_rng(42)  # fixed seed for reproducibility; change/remove if you want
+    mentor_fit = FitMatrix(
+        startup_ids=[st.id for st in startups],
+        mentor_ids=[m.id for m in mentors],
+        scores=rng.random((len(startups), len(mentors)), dtype=np.float32),
+    )
 
     # 2) Final structural check BEFORE running the MILP
     print("\n=== FINAL STRUCTURAL CHECK ===")
@@ -81,6 +87,7 @@ def main():
         startups,
         mentor_fit,
         num_sgms=3,
+        sets_and_params=diags["sets_and_params"],
     )
     print("\nSolver status:", status)
 
@@ -91,15 +98,17 @@ def main():
     # 4) Pretty-print schedule per SGM/table, WITH mentors
     sgms = [1, 2, 3]
 
+    # One pass over sol: (SGM, table) -> startup
+    grid = {}
+    for (s, t, k), v in sol.items():
+        if v == 1:
+            grid.setdefault((k, t), s)
+
     for k in sgms:
         print(f"\n=== SGM {k} ===")
         for t in tables:
-            startup_here = [
-                s for (s, tt, kk), v in sol.items()
-                if v == 1 and tt == t and kk == k
-            ]
-            label = startup_here[0] if startup_here else "-"
-            mentors_here = ", ".join(table_to_mentors.get(t, [])) or "–"
+            label = grid.get((k, t), "-")
+            mentors_here = mentor_labels.get(t) or "–"
             print(f"Table {t} [{mentors_here}]: {label}")
 
 
@@ -1,4 +1,10 @@
 # run_tests.py
+import contextlib
+import io
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
 from cdl_matching.data_generation.toy_dataset import make_toy_dataset
 from cdl_matching.scheduling.solve import solve_schedule
 from cdl_matching.scheduling.diagnostics import analyze_session_feasibility
@@ -45,9 +51,9 @@ def run_test_case(name, num_startups, num_mentors_pool, target_mentors, target_t
         
     # 3. Print Debug Info
     print("\n[DEBUG] Mentor Assignments:")
-    mentors_by_table = {}
+    mentors_by_table = defaultdict(list)
     for m in mentors:
-        mentors_by_table.setdefault(m.table_id, []).append(m.id)
+        mentors_by_table[m.table_id].append(m.id)
     for t in sorted(mentors_by_table.keys()):
         print(f"  Table {t}: {mentors_by_table[t]}")
         
@@ -73,35 +79,54 @@ def run_test_case(name, num_startups, num_mentors_pool, target_mentors, target_t
         startups,
         mentor_fit,
         num_sgms=3,
+        sets_and_params=diag["sets_and_params"],
     )
     print(f"\n[RESULT] Solver Status: {status}")
     
     if status == "Optimal":
         print("Schedule found!")
 
-def main():
+# Each case is independent, so main() runs them in parallel processes
+TEST_CASES = [
     # Test Case 1: One Startup, Many Mentors
     # Goal: Should pick the absolute best mentors for S1 and put them on tables.
-    run_test_case(
+    dict(
         name="1 Startup, 20 Mentors -> Select 9",
         num_startups=1,
         num_mentors_pool=20,
         target_mentors=9,
         target_tables=3
-    )
+    ),
 
     # Test Case 2: Two Startups, Six Mentors (Edge Case)
     # Goal: Tight constraints. 6 mentors = 2 per table (if 3 tables) or 3 per table (if 2 tables).
     # We target 3 tables, so 2 mentors per table.
     # This is tricky because each table needs 3 slots usually? No, capacity is per SGM.
     # But if a table has only 2 mentors, it's fine as long as they are good.
-    run_test_case(
+    dict(
         name="2 Startups, 9 Mentors -> Select 9",
         num_startups=2,
         num_mentors_pool=9,
         target_mentors=9,
         target_tables=3
-    )
+    ),
+]
+
+
+def _run_test_case_captured(spec):
+    """run_test_case(**spec) with its output captured, so parallel runs don't interleave."""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        run_test_case(**spec)
+    return buf.getvalue()
+
+
+def main():
+    workers = min(len(TEST_CASES), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        # map() yields in submission order: reports print in case order
+        for output in ex.map(_run_test_case_captured, TEST_CASES):
+            print(output, end="")
 
 if __name__ == "__main__":
     main()
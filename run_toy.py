@@ -1,11 +1,114 @@
 # run_toy.py
 
-import pandas as pd
+import importlib.util
+from dataclasses import replace
+from operator import attrgetter
 
-from cdl_matching.scheduling.joint_milp import solve_joint_schedule
+import numpy as np
+
+from cdl_matching.models import FitMatrix
+from cdl_matching.scheduling.joint_milp import prune_dominated_mentors, solve_joint_schedule
 from cdl_matching.config import NUM_STARTUPS_DEFAULT
 from cdl_matching.data_generation.toy_dataset import make_toy_dataset
-from cdl_matching.scheduling.solve import _build_table_fit
+from cdl_matching.scheduling.sets_and_params import _mentor_index, _mentor_layout
+
+
+_HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+if _HAS_NUMBA:
+    import numba
+
+
+def _dense_fit(startups: list, mentors: list, mentor_fit) -> np.ndarray:
+    """
+    Fit as a float64 (startups x mentors) array; missing pairs score 0.0.
+    """
+    if (
+        isinstance(mentor_fit, FitMatrix)
+        and all(s.id in mentor_fit.startup_index for s in startups)
+        and all(m.id in mentor_fit.mentor_index for m in mentors)
+    ):
+        fit = mentor_fit.submatrix([s.id for s in startups], [m.id for m in mentors])
+        return np.nan_to_num(fit.astype(np.float64), nan=0.0)
+
+    return np.array(
+        [[mentor_fit.get((s.id, m.id), 0.0) for m in mentors] for s in startups],
+        dtype=np.float64,
+    ).reshape(len(startups), len(mentors))
+
+
+def _top_k_mask(fit: np.ndarray, k: int) -> np.ndarray:
+    """
+    Boolean mask of each row's k largest entries, without sorting rows.
+
+    np.partition finds the k-th largest value per row; everything above
+    it is in, and entries equal to it are taken left to right until the
+    row has k, which is the set a stable descending sort would pick.
+    """
+    n_cols = fit.shape[1]
+    k = min(k, n_cols)
+    if k == 0:
+        return np.zeros(fit.shape, dtype=bool)
+    kth = np.partition(fit, n_cols - k, axis=1)[:, n_cols - k, None]
+    above = fit > kth
+    at_kth = fit == kth
+    room = k - above.sum(axis=1, keepdims=True)
+    return above | (at_kth & (np.cumsum(at_kth, axis=1) <= room))
+
+
+def _top_k(fit: np.ndarray, k: int) -> tuple:
+    """
+    (cols, vals): each row's k largest entries, best first, as two
+    (rows x k) arrays. Same picks and order as a stable descending sort,
+    but only the k chosen entries per row are sorted.
+    """
+    k = min(k, fit.shape[1])
+    _, cols = np.nonzero(_top_k_mask(fit, k))
+    cols = cols.reshape(fit.shape[0], k)
+    vals = np.take_along_axis(fit, cols, axis=1)
+    order = np.argsort(-vals, axis=1, kind="stable")
+    return np.take_along_axis(cols, order, axis=1), np.take_along_axis(vals, order, axis=1)
+
+
+def _score_top_k(fit: np.ndarray, k: int) -> np.ndarray:
+    """
+    Per-mentor sum of fit over the startups that rank it in their top k,
+    in one pass over fit with no temporaries.
+
+    Each row keeps a size-k insertion list (an entry only displaces a
+    strictly smaller one, so ties go to the earlier mentor) and credits
+    it row by row, matching the NumPy path in optimize_mentor_selection
+    bit for bit. Compiled with numba when it is installed.
+    """
+    n_rows, n_cols = fit.shape
+    k = min(k, n_cols)
+    out = np.zeros(n_cols)
+    if k == 0:
+        return out
+    top_val = np.empty(k)
+    top_col = np.empty(k, dtype=np.int64)
+    for i in range(n_rows):
+        size = 0
+        for j in range(n_cols):
+            v = fit[i, j]
+            if size == k and v <= top_val[k - 1]:
+                continue
+            pos = size if size < k else k - 1
+            while pos > 0 and top_val[pos - 1] < v:
+                top_val[pos] = top_val[pos - 1]
+                top_col[pos] = top_col[pos - 1]
+                pos -= 1
+            top_val[pos] = v
+            top_col[pos] = j
+            if size < k:
+                size += 1
+        for p in range(size):
+            out[top_col[p]] += top_val[p]
+    return out
+
+
+if _HAS_NUMBA:
+    _score_top_k = numba.njit(cache=True)(_score_top_k)
 
 
 def optimize_mentor_selection(
@@ -13,49 +116,68 @@ def optimize_mentor_selection(
     startups: list,
     mentor_fit: dict,
     target_count: int = 30,
-    target_tables: int = 10
+    target_tables: int = 10,
+    verbose: bool = True,
 ) -> list:
     """
     Select the best `target_count` mentors based on fit scores and
-    redistribute them across `target_tables` tables.
+    redistribute them across `target_tables` tables. verbose=False
+    skips the progress printout.
     """
-    print(f"\n[OPTIMIZATION] Selecting top {target_count} mentors for {len(startups)} startups...")
+    if verbose:
+        print(f"\n[OPTIMIZATION] Selecting top {target_count} mentors for {len(startups)} startups...")
 
     # 1. Score each mentor (sum of top fit scores per startup)
-    mentor_scores = {m.id: 0.0 for m in mentors}
-    
-    for s in startups:
-        fits = []
-        for m in mentors:
-            score = mentor_fit.get((s.id, m.id), 0.0)
-            fits.append((score, m.id))
-        
-        fits.sort(key=lambda x: x[0], reverse=True)
-        
-        # Give more weight to higher-ranked mentors
-        for i in range(min(len(fits), 5)):
-            score, mid = fits[i]
-            mentor_scores[mid] += score
-
-    # 2. Select top N mentors
-    sorted_mentors = sorted(mentors, key=lambda m: mentor_scores[m.id], reverse=True)
-    selected_mentors = sorted_mentors[:target_count]
+    fit = _dense_fit(startups, mentors, mentor_fit)
+
+    # Give more weight to higher-ranked mentors: each startup credits its
+    # top 5 (ties go to the earlier mentor, see _top_k_mask)
+    if _HAS_NUMBA:
+        mentor_scores = _score_top_k(fit, 5)
+    else:
+        rows, cols = np.nonzero(_top_k_mask(fit, 5))
+        mentor_scores = np.zeros(len(mentors))
+        np.add.at(mentor_scores, cols, fit[rows, cols])
+
+    # 2. Select top N mentors (a set: they are re-sorted by id below)
+    picked = np.flatnonzero(_top_k_mask(mentor_scores[None, :], target_count)[0])
+    selected_mentors = [mentors[j] for j in picked.tolist()]
     
-    selected_ids = {m.id for m in selected_mentors}
-    print(f"[OPTIMIZATION] Selected Mentors: {sorted(list(selected_ids))}")
+    if verbose:
+        print(f"[OPTIMIZATION] Selected Mentors: {sorted(m.id for m in selected_mentors)}")
     
     # 3. Redistribute across tables (round-robin across target_tables)
-    selected_mentors.sort(key=lambda m: m.id)
+    selected_mentors.sort(key=attrgetter("id"))
     
-    for i, m in enumerate(selected_mentors):
-        new_table = (i % target_tables) + 1
-        m.table_id = new_table
+    # Mentors are immutable; build relocated copies
+    selected_mentors = [
+        replace(m, table_id=(i % target_tables) + 1)
+        for i, m in enumerate(selected_mentors)
+    ]
         
-    print(f"[OPTIMIZATION] Redistributed {len(selected_mentors)} mentors across {target_tables} tables.")
+    if verbose:
+        print(f"[OPTIMIZATION] Redistributed {len(selected_mentors)} mentors across {target_tables} tables.")
     return selected_mentors
 
 
-def main():
+def _print_matrix(values: np.ndarray, row_labels: list, col_labels: list) -> None:
+    """Print a labelled 2-D array with two decimals, columns right-aligned."""
+    cells = [[f"{v:.2f}" for v in row] for row in values.tolist()]
+    label_width = max((len(str(r)) for r in row_labels), default=0)
+    widths = [
+        max([len(str(c))] + [len(row[j]) for row in cells])
+        for j, c in enumerate(col_labels)
+    ]
+    print(" " * label_width + "".join(f"  {str(c):>{w}}" for c, w in zip(col_labels, widths)))
+    for label, row in zip(row_labels, cells):
+        print(f"{str(label):<{label_width}}" + "".join(f"  {v:>{w}}" for v, w in zip(row, widths)))
+
+
+def main(verbose: bool = False):
+    """
+    Run the toy session end to end. verbose=True (--verbose on the command
+    line) also prints the fit matrices, table groups and top-3 analysis.
+    """
     # ---- Session settings ----
     import os
     import math
@@ -72,14 +194,12 @@ def main():
     
     if os.path.exists(FIT_SCORES_CSV_PATH):
         print(f"Found CSV at {FIT_SCORES_CSV_PATH}. Loading full dataset...")
-        fit_data = load_fit_from_csv(FIT_SCORES_CSV_PATH)
+        fit_data = load_fit_from_csv(FIT_SCORES_CSV_PATH, cache=True)
         
         if fit_data:
-            unique_startups = {k[0] for k in fit_data.keys()}
-            unique_mentors = {k[1] for k in fit_data.keys()}
-            
-            num_startups = len(unique_startups)
-            num_mentors_pool = len(unique_mentors)
+            # FitMatrix already carries the id lists; no need to scan its keys
+            num_startups = len(fit_data.startup_ids)
+            num_mentors_pool = len(fit_data.mentor_ids)
             
             # Initial tables - enough to hold everyone
             num_tables = math.ceil(num_mentors_pool / MENTORS_PER_TABLE_DEFAULT)
@@ -95,7 +215,7 @@ def main():
         num_startups=num_startups,
         mentors_per_table=3,
         num_mentors_pool=num_mentors_pool,
-        fit_matrix=fit_data if fit_data is not None else None,
+        fit_matrix=fit_data,
     )
 
     # Optional: shrink mentor pool via heuristic pre-selection
@@ -106,82 +226,84 @@ def main():
             mentor_fit,
             target_count=target_mentors,
             target_tables=target_tables,
+            verbose=verbose,
         )
         # Note: startups keep their domains and IDs; OS/OC will be overwritten
         # later by the joint MILP, so no need to re-run create_startups_with_os_oc.
 
     # ============================
-    #  PRINT FIT MATRICES (PANDAS)
+    #  PRINT FIT MATRICES
     # ============================
 
-    # Mentor–Startup fit matrix
-    mentor_ids = [m.id for m in mentors]
-    startup_ids = sorted(s.id for s in startups)
-
-    mentor_startup_matrix = [
-        [mentor_fit[(sid, mid)] for mid in mentor_ids]
-        for sid in startup_ids
-    ]
-    df_ms = pd.DataFrame(
-        mentor_startup_matrix,
-        index=startup_ids,
-        columns=mentor_ids,
-    )
-
-    print("=== MENTOR–STARTUP FIT MATRIX (0–1) ===")
-    print(df_ms.round(2))
-    print()
+    # Ids, tables and groupings for the final mentor pool, built once
+    # and read by every section below
+    mentor_map = {m.id: m for m in mentors}
+    startups_sorted = sorted(startups, key=attrgetter("id"))
+    startup_ids = [s.id for s in startups_sorted]
+    _, mentors_by_table = _mentor_index(_mentor_layout(mentors))
+    tables = sorted(mentors_by_table)
+    # Sorted mentor list per table, joined once for every printout below
+    mentors_label_by_table = {
+        t: ", ".join(sorted(mentors_by_table[t])) or "–" for t in tables
+    }
+
+    # Fit matrices, table groups and top-3 analysis are diagnostics only;
+    # with verbose=False none of it is computed
+    if verbose:
+        # Mentor–Startup fit matrix
+        mentor_ids = [m.id for m in mentors]
+        mentor_startup_matrix = FitMatrix.from_mapping(mentor_fit).submatrix(
+            startup_ids, mentor_ids
+        )
 
-    print("=== MENTOR GROUPS (TABLE ASSIGNMENTS) ===")
-    mentors_by_table = {}
-    for m in mentors:
-        mentors_by_table.setdefault(m.table_id, []).append(m.id)
-    
-    for t in sorted(mentors_by_table.keys()):
-        m_ids = sorted(mentors_by_table[t])
-        print(f"Table {t}: {', '.join(m_ids)}")
-    print()
+        print("=== MENTOR–STARTUP FIT MATRIX (0–1) ===")
+        _print_matrix(mentor_startup_matrix, startup_ids, mentor_ids)
+        print()
 
-    # Table–Startup fit matrix (for inspection only)
-    table_fit = _build_table_fit(mentors, startups, mentor_fit)
-    tables = sorted({m.table_id for m in mentors})
+        print("=== MENTOR GROUPS (TABLE ASSIGNMENTS) ===")
+        for t in tables:
+            print(f"Table {t}: {mentors_label_by_table[t]}")
+        print()
 
-    table_startup_matrix = [
-        [table_fit[(sid, t)] for t in tables]
-        for sid in startup_ids
-    ]
-    df_ts = pd.DataFrame(
-        table_startup_matrix,
-        index=startup_ids,
-        columns=[f"Table {t}" for t in tables],
-    )
+        # Table–Startup fit matrix (for inspection only): mentor columns
+        # regrouped by table, then one max-reduce per table group
+        mentor_col = {m_id: j for j, m_id in enumerate(mentor_ids)}
+        grouped_cols = [mentor_col[m_id] for t in tables for m_id in mentors_by_table[t]]
+        group_starts = np.cumsum([0] + [len(mentors_by_table[t]) for t in tables[:-1]])
+        table_startup_matrix = np.maximum.reduceat(
+            mentor_startup_matrix[:, grouped_cols], group_starts, axis=1
+        )
 
-    print("=== TABLE–STARTUP FIT MATRIX (max mentor fit per table) ===")
-    print(df_ts.round(2))
-    print()
+        print("=== TABLE–STARTUP FIT MATRIX (max mentor fit per table) ===")
+        _print_matrix(table_startup_matrix, startup_ids, [f"Table {t}" for t in tables])
+        print()
 
-    print("\n=== MENTOR GROUPING ANALYSIS (Top-3 per startup from CURRENT mentor pool) ===")
-    for s in sorted(startups, key=lambda x: x.id):
-        my_fits = []
-        for m in mentors:
-            my_fits.append((mentor_fit.get((s.id, m.id), 0.0), m))
-        my_fits.sort(key=lambda x: x[0], reverse=True)
-        
-        top_3 = my_fits[:3]
-        print(f"\n{s.id} Top 3 Available Mentors:")
-        for score, m in top_3:
-            print(f"  - {m.id} (Score {score:.2f}) @ Table {m.table_id}")
-    print()
+        print("\n=== MENTOR GROUPING ANALYSIS (Top-3 per startup from CURRENT mentor pool) ===")
+        # From the matrix printed above (missing pairs score 0.0), all
+        # startups at once; ties keep mentor order
+        top_cols, top_vals = _top_k(np.nan_to_num(mentor_startup_matrix, nan=0.0), 3)
+        for s, cols, vals in zip(startups_sorted, top_cols.tolist(), top_vals.tolist()):
+            print(f"\n{s.id} Top 3 Available Mentors:")
+            for j, score in zip(cols, vals):
+                m = mentors[j]
+                print(f"  - {m.id} (Score {score:.2f}) @ Table {m.table_id}")
+        print()
 
     # =====================================
     #  JOINT MILP: mentor selection + SGMs
     # =====================================
     print("=== JOINT MILP: OS/OC SELECTION + SCHEDULING ===")
+    # Dominated OS/OC roles are dropped up front (same optimum, smaller
+    # model); the startups' current OS/OC picks seed the first incumbent
     status, sol, os_assign, oc_assign = solve_joint_schedule(
-        mentors,
+        prune_dominated_mentors(mentors, startups, mentor_fit),
         startups,
         mentor_fit,
         num_sgms=num_sgms,
+        initial_assignment=(
+            {s.id: s.os_id for s in startups},
+            {s.id: s.oc_id for s in startups},
+        ),
     )
     print("Solver status:", status)
     print()
@@ -192,8 +314,7 @@ def main():
 
     # ---- Print chosen OS/OC per startup ----
     print("=== OS / OC MENTORS PER STARTUP (from joint MILP) ===")
-    mentor_map = {m.id: m for m in mentors}
-    for s in sorted(startups, key=lambda x: x.id):
+    for s in startups_sorted:
         os_id = os_assign.get(s.id, None)
         oc_id = oc_assign.get(s.id, None)
 
@@ -206,21 +327,19 @@ def main():
     print()
 
     # ---- Pretty print schedule: SGM × Table ----
-    tables = sorted({m.table_id for m in mentors})
     sgms = list(range(1, num_sgms + 1))
 
+    # One pass over sol: (SGM, table) -> startup
+    grid = {}
+    for (s_id, t_id, k), v in sol.items():
+        if v == 1:
+            grid.setdefault((k, t_id), s_id)
+
     for k in sgms:
         print(f"=== SGM {k} ===")
         for t in tables:
-            startup_here = [
-                s_id for (s_id, tt, kk), v in sol.items()
-                if v == 1 and tt == t and kk == k
-            ]
-            label = startup_here[0] if startup_here else "-"
-            mentors_here = ", ".join(
-                sorted(m.id for m in mentors if m.table_id == t)
-            ) or "–"
-            print(f"Table {t} [{mentors_here}]: {label}")
+            label = grid.get((k, t), "-")
+            print(f"Table {t} [{mentors_label_by_table[t]}]: {label}")
         print()
 
     # ---- Verification: OS in {1,2}, OC in {2,3}, and OS < OC ----
@@ -230,7 +349,7 @@ def main():
         if v == 1:
             startup_schedule[s_id].append((t_id, k))
 
-    for s in sorted(startups, key=lambda x: x.id):
+    for s in startups_sorted:
         os_id = os_assign.get(s.id)
         oc_id = oc_assign.get(s.id)
         os_table = mentor_map[os_id].table_id if os_id else None
@@ -253,4 +372,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the toy CDL matching session.")
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="also print the fit matrices, table groups and top-3 mentor analysis",
+    )
+    main(verbose=parser.parse_args().verbose)
@@ -4,12 +4,14 @@ import math
 import sys
 import os
 
+import pulp
+
 # Add parent directory to path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from cdl_matching.data_generation.toy_dataset import make_toy_dataset
+from cdl_matching.data_generation.toy_dataset import make_toy_dataset, make_toy_datasets
 from cdl_matching.scheduling.solve import solve_schedule
-from cdl_matching.scheduling.diagnostics import analyze_session_feasibility
+from cdl_matching.scheduling.diagnostics import analyze_session_feasibility, structural_precheck
 from cdl_matching.data_generation.startup_factory import create_startups_with_os_oc
 from run_toy import optimize_mentor_selection
 
@@ -18,13 +20,19 @@ class TestMatchingScenarios(unittest.TestCase):
     def run_pipeline(self, num_startups, num_mentors_pool, target_mentors, target_tables, fit_matrix=None):
         """
         Helper to run the full generation -> optimization -> scheduling pipeline.
-        Returns: (status, solution, mentors, startups)
+        Returns: (status, solution, mentors, startups, mentor_fit)
         """
-        # 1. Generate Data
         # Ensure initial tables isn't too high for the pool
         initial_tables = math.ceil(num_mentors_pool / 3)
         if initial_tables < 1: initial_tables = 1
-        
+
+        # 0. Sessions ruled out by table/startup counts alone stop here,
+        # before any data or fit scores are built
+        final_tables = target_tables if num_mentors_pool > target_mentors else initial_tables
+        if structural_precheck(num_startups, final_tables):
+            return "Structurally Infeasible", {}, [], [], None
+
+        # 1. Generate Data
         mentors, startups, mentor_fit = make_toy_dataset(
             num_tables=initial_tables, 
             num_startups=num_startups,
@@ -41,7 +49,8 @@ class TestMatchingScenarios(unittest.TestCase):
                 startups, 
                 mentor_fit, 
                 target_count=target_mentors, 
-                target_tables=target_tables
+                target_tables=target_tables,
+                verbose=False,
             )
             
             # Re-assign OS/OC
@@ -62,7 +71,7 @@ class TestMatchingScenarios(unittest.TestCase):
         )
         
         if not diag["ok"]:
-            return "Structurally Infeasible", {}, mentors, startups
+            return "Structurally Infeasible", {}, mentors, startups, mentor_fit
 
         # 4. Solve
         status, sol = solve_schedule(
@@ -70,6 +79,7 @@ class TestMatchingScenarios(unittest.TestCase):
             startups,
             mentor_fit,
             num_sgms=3,
+            sets_and_params=diag["sets_and_params"],
         )
         return status, sol, mentors, startups, mentor_fit
 
@@ -225,5 +235,463 @@ class TestMatchingScenarios(unittest.TestCase):
         # 4. Verify mentor fit quality (low threshold since all scores are low)
         self.verify_mentor_fit_quality(selected_mentors, startups, mentor_fit, min_fit_threshold=0.05)
 
+
+class TestFitMatrix(unittest.TestCase):
+
+    CSV_PATH = os.path.join(
+        os.path.dirname(__file__), '..', 'cdl_matching', 'data_generation', 'fit_matrix.csv'
+    )
+
+    def test_load_fit_from_csv(self):
+        """CSV loads into a dense startup x mentor matrix with tuple-key access."""
+        from cdl_matching.data_generation.toy_dataset import load_fit_from_csv
+
+        fit = load_fit_from_csv(self.CSV_PATH)
+
+        self.assertEqual(fit.startup_ids, ["S1", "S2", "S3"])
+        self.assertEqual(len(fit.mentor_ids), 15)
+        self.assertEqual(fit.scores.shape, (3, 15))
+        self.assertAlmostEqual(fit[("S1", "M001")], 0.78, places=5)
+        self.assertAlmostEqual(fit.score("S2", "M002"), 0.74, places=5)
+        self.assertEqual(len(fit), 45)
+        self.assertIsNone(fit.get(("S9", "M001")))
+
+    def test_load_fit_from_csv_chunked(self):
+        """Reading in chunks gives the same matrix as a single read."""
+        from cdl_matching.data_generation.toy_dataset import load_fit_from_csv
+
+        whole = load_fit_from_csv(self.CSV_PATH)
+        chunked = load_fit_from_csv(self.CSV_PATH, chunksize=4)
+
+        self.assertEqual(chunked.startup_ids, whole.startup_ids)
+        self.assertEqual(chunked.mentor_ids, whole.mentor_ids)
+        self.assertEqual(chunked.scores.tolist(), whole.scores.tolist())
+
+    def test_load_fit_from_csv_npz_cache(self):
+        """cache=True writes an .npz sidecar, reuses it, and ignores it once stale."""
+        import shutil
+        import tempfile
+        from cdl_matching.data_generation.toy_dataset import load_fit_from_csv
+
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "fit.csv")
+            shutil.copy(self.CSV_PATH, csv_path)
+
+            parsed = load_fit_from_csv(csv_path, cache=True)
+            self.assertTrue(os.path.exists(csv_path + ".npz"))
+            cached = load_fit_from_csv(csv_path, cache=True)
+            self.assertEqual(cached.startup_ids, parsed.startup_ids)
+            self.assertEqual(cached.mentor_ids, parsed.mentor_ids)
+            self.assertEqual(cached.scores.tolist(), parsed.scores.tolist())
+
+            with open(csv_path, "w") as f:
+                f.write(",S1\nM1,0.5\n")
+            stale = os.path.getmtime(csv_path) - 60
+            os.utime(csv_path + ".npz", (stale, stale))
+            self.assertEqual(load_fit_from_csv(csv_path, cache=True).mentor_ids, ["M1"])
+
+    def test_numpy_csv_reader_matches_pandas(self):
+        """The pandas-free CSV reader parses the same ids and scores."""
+        import tempfile
+        from cdl_matching.data_generation.toy_dataset import _read_fit_csv_numpy, load_fit_from_csv
+
+        fit = load_fit_from_csv(self.CSV_PATH)
+        startup_ids, mentor_ids, values = _read_fit_csv_numpy(self.CSV_PATH)
+
+        self.assertEqual(startup_ids, fit.startup_ids)
+        self.assertEqual(mentor_ids, fit.mentor_ids)
+        self.assertEqual(values.T.tolist(), fit.scores.tolist())
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(",S1,S2\nM1,0.5,n/a\nM2,,0.25\n")
+        try:
+            _, _, values = _read_fit_csv_numpy(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(values[0, 0], 0.5)
+        self.assertTrue(math.isnan(values[0, 1]) and math.isnan(values[1, 0]))
+        self.assertEqual(values[1, 1], 0.25)
+
+    def test_from_mapping(self):
+        """A tuple-keyed dict converts to a FitMatrix with NaN for absent pairs."""
+        from cdl_matching.models import FitMatrix
+
+        fit = FitMatrix.from_mapping({("S1", "M1"): 0.5, ("S1", "M2"): 0.25, ("S2", "M2"): 1.0})
+
+        self.assertEqual(fit.startup_ids, ["S1", "S2"])
+        self.assertEqual(fit.mentor_ids, ["M1", "M2"])
+        self.assertEqual(dict(fit), {("S1", "M1"): 0.5, ("S1", "M2"): 0.25, ("S2", "M2"): 1.0})
+        self.assertEqual(fit.submatrix(["S2", "S1"], ["M2"]).tolist(), [[1.0], [0.25]])
+        self.assertNotIn(("S2", "M1"), fit)
+        self.assertEqual(fit.as_dict(), dict(fit))
+        self.assertEqual(
+            fit.pair_scores([("S2", "M2"), ("S2", "M1"), ("S9", "M1"), ("S1", "M1")]).tolist(),
+            [1.0, 0.0, 0.0, 0.5],
+        )
+
+
+class TestDiagnostics(unittest.TestCase):
+
+    def test_auto_fix_overloaded_tables(self):
+        """Overloaded OC/OS tables are spread out without breaking OS != OC."""
+        from cdl_matching.scheduling.diagnostics import auto_fix_overloaded_tables
+
+        S = ["S1", "S2", "S3", "S4"]
+        T = [1, 2, 3, 4]
+        table_os = {"S1": 2, "S2": 2, "S3": 2, "S4": 3}
+        table_oc = {"S1": 1, "S2": 1, "S3": 1, "S4": 1}
+
+        new_os, new_oc, ok, info = auto_fix_overloaded_tables(S, T, table_os, table_oc)
+
+        self.assertTrue(ok)
+        self.assertEqual(table_oc["S1"], 1)  # caller's dicts untouched
+        self.assertFalse(info["os_overloaded"] or info["oc_overloaded"] or info["total_overloaded"])
+        for s in S:
+            self.assertNotEqual(new_os[s], new_oc[s])
+
+    def test_structural_precheck(self):
+        """Counting-only precheck agrees with the full analysis on table shortfalls."""
+        self.assertEqual(structural_precheck(num_startups=4, num_tables=4), [])
+        self.assertTrue(structural_precheck(num_startups=5, num_tables=4))
+
+        mentors, startups, _ = make_toy_dataset(
+            num_tables=3, num_startups=4, mentors_per_table=2, seed=1
+        )
+        diag = analyze_session_feasibility(mentors, startups)
+        self.assertFalse(diag["ok"])
+        self.assertTrue(structural_precheck(len(startups), diag["num_tables"]))
+
+    def test_apply_move_matches_full_analysis(self):
+        """Patching diagnostics with one move gives the same report as a full pass."""
+        from cdl_matching.scheduling.diagnostics import apply_move_to_diagnostics
+
+        mentors, startups, _ = make_toy_dataset(
+            num_tables=4, num_startups=6, mentors_per_table=2, seed=3
+        )
+        diag = analyze_session_feasibility(mentors, startups)
+
+        st, new_mentor = startups[0], mentors[-1]
+        st.oc_id = new_mentor.id
+        patched = apply_move_to_diagnostics(diag, st.id, "OC", new_mentor.table_id)
+        full = analyze_session_feasibility(mentors, startups)
+
+        for key in ("ok", "messages", "oc_table_counts", "total_table_meetings",
+                    "oc_overloaded", "total_overloaded"):
+            self.assertEqual(patched[key], full[key])
+        self.assertEqual(patched["sets_and_params"], full["sets_and_params"])
+
+    def test_repair_state_tracks_moves(self):
+        """RepairState loads and heap order stay in sync with a full recompute."""
+        from cdl_matching.scheduling.interactive_repair import RepairState, _recompute_loads
+
+        mentors, startups, _ = make_toy_dataset(
+            num_tables=4, num_startups=6, mentors_per_table=2, seed=3
+        )
+        state = RepairState(mentors, startups)
+        for i, st in enumerate(startups[:4]):
+            new_id = mentors[(i * 3) % len(mentors)].id
+            state.move("OS", st.os_id, new_id)
+            st.os_id = new_id
+
+        loads = _recompute_loads(mentors, startups)
+        self.assertEqual(state.loads, loads)
+        _, _, table_os_load, table_oc_load = loads
+        expected = sorted(
+            mentors, key=lambda m: table_os_load[m.table_id] + table_oc_load[m.table_id]
+        )
+        self.assertEqual(list(state.mentors_by_table_load()), expected)
+        # Iterating again yields the same order (popped entries were restored)
+        self.assertEqual(list(state.mentors_by_table_load()), expected)
+
+
+class TestToyDataset(unittest.TestCase):
+
+    def test_make_toy_dataset_disk_cache(self):
+        """A cached dataset is written once and reloaded unchanged."""
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            first = make_toy_dataset(num_tables=4, num_startups=4, seed=7, cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            second = make_toy_dataset(num_tables=4, num_startups=4, seed=7, cache_dir=cache_dir)
+            self.assertEqual(first[0], second[0])
+            self.assertEqual(first[1], second[1])
+            self.assertEqual(dict(first[2]), dict(second[2]))
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_make_toy_dataset_empty(self):
+        """Zero tables and zero startups yields an empty dataset."""
+        mentors, startups, mentor_fit = make_toy_dataset(num_tables=0, num_startups=0)
+        self.assertEqual(mentors, [])
+        self.assertEqual(startups, [])
+        self.assertEqual(len(mentor_fit), 0)
+
+    def test_make_toy_datasets_matches_serial(self):
+        """Parallel batch generation returns the same datasets, in seed order."""
+        seeds = [1, 2, 3]
+        batch = make_toy_datasets(seeds, max_workers=2, num_tables=4, num_startups=4)
+        for seed, (mentors, startups, _) in zip(seeds, batch):
+            ref_mentors, ref_startups, _ = make_toy_dataset(num_tables=4, num_startups=4, seed=seed)
+            self.assertEqual(mentors, ref_mentors)
+            self.assertEqual(startups, ref_startups)
+
+    def test_make_toy_dataset_frames(self):
+        """Frame view has one row per mentor/startup and a matching fit array."""
+        from cdl_matching.data_generation.toy_dataset import make_toy_dataset_frames
+
+        mentors, startups, mentor_fit = make_toy_dataset(num_tables=4, num_startups=4, seed=3)
+        mentors_df, startups_df, fit = make_toy_dataset_frames(num_tables=4, num_startups=4, seed=3)
+
+        self.assertEqual(list(mentors_df["id"]), [m.id for m in mentors])
+        self.assertEqual(list(startups_df["os_id"]), [s.os_id for s in startups])
+        self.assertEqual(fit.shape, (len(startups), len(mentors)))
+        self.assertEqual(fit[1, 2], mentor_fit[(startups[1].id, mentors[2].id)])
+
+    def test_optimal_os_selection(self):
+        """Optimal OS/OC selection respects caps/tables and never scores below greedy."""
+        mentors, _, mentor_fit = make_toy_dataset(num_tables=10, num_startups=10, seed=1)
+        table_of = {m.id: m.table_id for m in mentors}
+
+        totals = {}
+        for selection in ("argmax", "optimal"):
+            startups = create_startups_with_os_oc(
+                mentors, num_startups=10, seed=2, mentor_fit=mentor_fit,
+                max_os_per_mentor=1, max_oc_per_mentor=1, selection=selection,
+            )
+            self.assertEqual(len({s.os_id for s in startups}), 10)
+            self.assertEqual(len({s.oc_id for s in startups}), 10)
+            for s in startups:
+                self.assertNotEqual(table_of[s.os_id], table_of[s.oc_id])
+            totals[selection] = sum(mentor_fit[(s.id, s.os_id)] for s in startups)
+
+        self.assertGreaterEqual(totals["optimal"], totals["argmax"] - 1e-6)
+
+
+class TestSolveSchedule(unittest.TestCase):
+
+    def test_greedy_warm_start_is_feasible(self):
+        """The greedy warm start respects capacity and OS-before-OC."""
+        from cdl_matching.scheduling.sets_and_params import build_sets_and_params
+        from cdl_matching.scheduling.solve import _build_table_fit, greedy_schedule
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=3, seed=4
+        )
+        S, T, table_os, table_oc = build_sets_and_params(mentors, startups)
+        table_fit = _build_table_fit(mentors, startups, mentor_fit)
+        seats = greedy_schedule(S, T, table_os, table_oc, table_fit)
+        self.assertIsNotNone(seats)
+
+        self.assertEqual(len({(t, k) for _, t, k in seats}), len(seats))
+        for s in S:
+            mine = {k: t for s_id, t, k in seats if s_id == s}
+            self.assertEqual(sorted(mine), [1, 2, 3])
+            os_k = [k for k, t in mine.items() if t == table_os[s]]
+            oc_k = [k for k, t in mine.items() if t == table_oc[s]]
+            self.assertEqual(len(os_k), 1)
+            self.assertEqual(len(oc_k), 1)
+            self.assertLess(os_k[0], oc_k[0])
+
+        status, _ = solve_schedule(mentors, startups, mentor_fit)
+        self.assertEqual(status, "Optimal")
+
+    def test_greedy_warm_start_large_session(self):
+        """The greedy search is not bounded by the recursion limit."""
+        from cdl_matching.scheduling.solve import greedy_schedule
+
+        n = sys.getrecursionlimit() + 500
+        S = {f"S{i:05d}" for i in range(n)}
+        table_os = {s: i + 1 for i, s in enumerate(sorted(S))}
+        table_oc = {s: i % n + 1 for s, i in table_os.items()}
+        seats = greedy_schedule(
+            S, set(range(1, n + 1)), table_os, table_oc, {}, num_sgms=2
+        )
+        self.assertEqual(len(seats), 2 * n)
+
+    def test_feasibility_only_without_fit(self):
+        """Without mentor_fit the MILP still returns a full valid schedule."""
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=3, seed=4
+        )
+        status, sol = solve_schedule(mentors, startups)
+        self.assertEqual(status, "Optimal")
+        self.assertEqual(len(sol), 3 * len(startups))
+        self.assertEqual(len({(t, k) for _, t, k in sol}), len(sol))
+
+    def test_min_table_fit_prunes_and_falls_back(self):
+        """Pruned solves only seat good-fit tables; infeasible pruning falls back."""
+        from cdl_matching.scheduling.sets_and_params import build_sets_and_params
+        from cdl_matching.scheduling.solve import _build_table_fit
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=3, seed=4
+        )
+        _, _, table_os, table_oc = build_sets_and_params(mentors, startups)
+        table_fit = _build_table_fit(mentors, startups, mentor_fit)
+
+        status, sol = solve_schedule(mentors, startups, mentor_fit, min_table_fit=0.5)
+        self.assertEqual(status, "Optimal")
+        for s_id, t, _k in sol:
+            if t not in (table_os[s_id], table_oc[s_id]):
+                self.assertGreater(table_fit[(s_id, t)], 0.5)
+
+        full = solve_schedule(mentors, startups, mentor_fit)
+        fallback = solve_schedule(mentors, startups, mentor_fit, min_table_fit=1.0)
+        self.assertEqual(fallback[0], "Optimal")
+        self.assertAlmostEqual(
+            sum(table_fit[(s, t)] for s, t, _ in fallback[1]),
+            sum(table_fit[(s, t)] for s, t, _ in full[1]),
+            places=6,
+        )
+
+    def test_table_fit_cached_per_layout(self):
+        """Table fits are reused for the same seating and recomputed after a move."""
+        from dataclasses import replace
+        from cdl_matching.scheduling.solve import _build_table_fit
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=3, seed=4
+        )
+        first = _build_table_fit(mentors, startups, mentor_fit)
+        first[next(iter(first))] = -1.0  # callers get their own copy
+        again = _build_table_fit(mentors, startups, mentor_fit)
+        self.assertEqual(again, _build_table_fit(mentors, startups, mentor_fit.as_dict()))
+
+        moved = [replace(mentors[0], table_id=mentors[-1].table_id)] + mentors[1:]
+        self.assertEqual(
+            _build_table_fit(moved, startups, mentor_fit),
+            _build_table_fit(moved, startups, mentor_fit.as_dict()),
+        )
+
+    def test_model_reused_across_fit_sweeps(self):
+        """Re-solving the same sessions reuses the built model with a new objective."""
+        from cdl_matching.scheduling import solve as solve_mod
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=3, seed=4
+        )
+        reversed_fit = {pair: 1.0 - fit for pair, fit in mentor_fit.items()}
+
+        solve_mod._MODEL_CACHE.clear()
+        self.assertEqual(solve_schedule(mentors, startups, mentor_fit)[0], "Optimal")
+        self.assertEqual(solve_schedule(mentors, startups)[0], "Optimal")
+        status, reused = solve_schedule(mentors, startups, reversed_fit)
+        self.assertEqual(len(solve_mod._MODEL_CACHE), 2)
+
+        solve_mod._MODEL_CACHE.clear()
+        fresh = solve_schedule(mentors, startups, reversed_fit)
+        self.assertEqual((status, reused), fresh)
+
+    def test_solver_name(self):
+        """solve_schedule honours an explicit solver and rejects unknown ones."""
+        from cdl_matching.scheduling.solvers import make_solver
+
+        self.assertIsInstance(make_solver("cbc"), pulp.PULP_CBC_CMD)
+        with self.assertRaises(ValueError):
+            make_solver("glpk")
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=3, seed=4
+        )
+        status, _ = solve_schedule(mentors, startups, mentor_fit, solver_name="cbc")
+        self.assertEqual(status, "Optimal")
+
+
+class TestJointMilp(unittest.TestCase):
+
+    def test_cached_model_resolves_with_new_fit(self):
+        """Re-solving a cached model with new fit scores matches a fresh build."""
+        import copy
+        import random
+        from cdl_matching.scheduling import joint_milp
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=5, num_startups=4, mentors_per_table=2, num_mentors_pool=10, seed=5
+        )
+        rng = random.Random(0)
+        new_fit = {key: rng.random() for key in mentor_fit}
+
+        joint_milp.solve_joint_schedule(mentors, copy.deepcopy(startups), mentor_fit)
+        cached = joint_milp.solve_joint_schedule(mentors, copy.deepcopy(startups), new_fit)
+        joint_milp._MODEL_CACHE.clear()
+        fresh = joint_milp.solve_joint_schedule(mentors, copy.deepcopy(startups), new_fit)
+
+        self.assertEqual(cached[0], "Optimal")
+        self.assertEqual(cached, fresh)
+
+    def test_initial_assignment_is_feasible_incumbent(self):
+        """The heuristic warm start satisfies every constraint and keeps the optimum."""
+        import copy
+        from cdl_matching.scheduling import joint_milp
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=10, num_startups=10, mentors_per_table=3, num_mentors_pool=30, seed=0
+        )
+        seed = ({s.id: s.os_id for s in startups}, {s.id: s.oc_id for s in startups})
+        model = joint_milp.build_joint_model(mentors, startups)
+        self.assertTrue(joint_milp.set_initial_assignment(model, mentors, mentor_fit, *seed))
+        self.assertTrue(model.prob.valid())
+
+        cold = joint_milp.solve_joint_model(model, mentor_fit)
+        warm = joint_milp.solve_joint_schedule(
+            mentors, copy.deepcopy(startups), mentor_fit, initial_assignment=seed
+        )
+        self.assertEqual(warm[0], "Optimal")
+        self.assertAlmostEqual(
+            sum(mentor_fit[p] for a in warm[2:] for p in a.items()),
+            sum(mentor_fit[p] for a in cold[2:] for p in a.items()),
+            places=5,
+        )
+
+    def test_prune_dominated_mentors_keeps_optimum(self):
+        """Dropping dominated OS/OC roles shrinks the model but not the optimal fit."""
+        import copy
+        from cdl_matching.scheduling.joint_milp import prune_dominated_mentors, solve_joint_schedule
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=6, num_startups=5, mentors_per_table=5, num_mentors_pool=30, seed=1
+        )
+        pruned = prune_dominated_mentors(mentors, startups, mentor_fit)
+        self.assertEqual([(m.id, m.table_id) for m in pruned], [(m.id, m.table_id) for m in mentors])
+        self.assertLess(sum(m.can_be_os for m in pruned), sum(m.can_be_os for m in mentors))
+
+        totals = []
+        for pool in (mentors, pruned):
+            status, _, os_assign, oc_assign = solve_joint_schedule(
+                pool, copy.deepcopy(startups), mentor_fit
+            )
+            self.assertEqual(status, "Optimal")
+            totals.append(sum(mentor_fit[p] for a in (os_assign, oc_assign) for p in a.items()))
+        self.assertAlmostEqual(totals[0], totals[1], places=5)
+
+    def test_add_lock_pins_os_mentor(self):
+        """A locked OS mentor is kept on re-solve, and the lock can be replaced."""
+        from cdl_matching.scheduling.joint_milp import (
+            add_lock, build_joint_model, set_initial_assignment, solve_joint_model,
+        )
+
+        mentors, startups, mentor_fit = make_toy_dataset(
+            num_tables=5, num_startups=4, mentors_per_table=2, num_mentors_pool=10, seed=5
+        )
+        model = build_joint_model(mentors, startups)
+        status, _, os_assign, oc_assign = solve_joint_model(model, mentor_fit)
+        self.assertEqual(status, "Optimal")
+
+        s_id = startups[0].id
+        other = next(m.id for m in mentors if m.id not in (os_assign[s_id], oc_assign[s_id]))
+        add_lock(model, s_id, os_id=other)
+        # The incumbent honours the lock even when seeded with the old OS
+        self.assertTrue(set_initial_assignment(model, mentors, mentor_fit, os_assign, oc_assign))
+        self.assertEqual(sum(v.varValue for v in model.w_os[s_id][other].values()), 1)
+        status, _, locked_os, _ = solve_joint_model(model, mentor_fit, warm_start=True)
+        self.assertEqual(status, "Optimal")
+        self.assertEqual(locked_os[s_id], other)
+
+        add_lock(model, s_id, os_id=os_assign[s_id])
+        self.assertEqual(solve_joint_model(model, mentor_fit)[2], os_assign)
+        self.assertEqual(model.locks, {f"Lock_OS_{s_id}": os_assign[s_id]})
+
+
 if __name__ == '__main__':
     unittest.main()